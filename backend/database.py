@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -29,6 +29,36 @@ def get_db():
     finally:
         db.close()
 
+def ensure_columns():
+    """Add nullable columns declared after a table already existed (create_all never alters tables)."""
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+
+def backfill_defaults():
+    """Fill NULLs left in NOT NULL columns that have a server default (tables created before the constraint)."""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for column in table.columns:
+                if column.nullable or column.server_default is None:
+                    continue
+                conn.execute(table.update().where(column.is_(None)).values({column: column.server_default.arg}))
+
+def ensure_indexes():
+    """Create indexes declared after a table already existed (create_all skips existing tables)."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
 # Organization Model
 class Organization(Base):
     __tablename__ = "organizations"
@@ -41,8 +71,8 @@ class Organization(Base):
     contact_person = Column(String)
     contact_phone = Column(String)
     contact_email = Column(String)
-    capacity = Column(Integer, default=0)  # Number of people they can handle
-    current_load = Column(Integer, default=0)  # Current number of people being helped
+    capacity = Column(Integer, default=0, server_default=text("0"), nullable=False)  # Number of people they can handle
+    current_load = Column(Integer, default=0, server_default=text("0"), nullable=False)  # Current number of people being helped
     status = Column(String, default="Active")  # Active, Inactive, Overloaded
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -55,8 +85,8 @@ class Division(Base):
     organization_id = Column(String, ForeignKey("organizations.id"))
     type = Column(String, nullable=False)  # Medical, Rescue, Logistics, Communication
     description = Column(Text)
-    capacity = Column(Integer, default=0)
-    current_load = Column(Integer, default=0)
+    capacity = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    current_load = Column(Integer, default=0, server_default=text("0"), nullable=False)
     status = Column(String, default="Active")
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -89,7 +119,9 @@ class SOSRequest(Base):
     latitude = Column(Float, nullable=False)
     text = Column(Text)
     place = Column(String)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    # Timestamps are naive UTC stamped in Python, which keeps sub-second ordering
+    # on SQLite. server_default only covers rows inserted outside the ORM.
+    timestamp = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     category = Column(String)  # Needs Rescue, Medical, Food, etc.
     priority = Column(Integer, default=1)  # 1-5, 5 being highest
     assigned_to = Column(String, ForeignKey("staff.id"), nullable=True)
@@ -100,8 +132,13 @@ class SOSRequest(Base):
     actual_completion = Column(DateTime, nullable=True)
     assignment_time = Column(DateTime, nullable=True)
     accepted_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow)
+
+    # Recent tickets near a point: time window plus a lat/lon bounding box.
+    __table_args__ = (
+        Index("sos_requests_created_location", "created_at", "latitude", "longitude"),
+    )
 
 # Ticket Update History Model
 class TicketUpdate(Base):
@@ -116,6 +153,11 @@ class TicketUpdate(Base):
     update_time = Column(DateTime, default=datetime.utcnow)
     notes = Column(Text)
 
+    # History is always read newest-first per ticket.
+    __table_args__ = (
+        Index("ticket_updates_ticket_time", "ticket_id", update_time.desc()),
+    )
+
 # Shelter Model (Enhanced)
 class Shelter(Base):
     __tablename__ = "shelters"
@@ -212,6 +254,7 @@ class MobileIncident(Base):
     description_summary = Column(Text)
     device_id_hash = Column(String)
     client_ip = Column(String)
+    normalized_text_hash = Column(String, nullable=True)  # blake2b-128 of normalized text + transcript
     media_manifest = Column(Text)  # JSON object of persisted media refs
     normalized_payload = Column(Text)  # JSON canonical internal payload
     verification_payload = Column(Text)  # JSON verification/fraud/weather details
@@ -223,6 +266,14 @@ class MobileIncident(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Nearby-ticket scans (time window + bounding box) and fraud signal counts.
+    __table_args__ = (
+        Index("mobile_incidents_created_location", "created_at", "latitude", "longitude"),
+        Index("mobile_incidents_device_time", "device_id_hash", "created_at"),
+        Index("mobile_incidents_ip_time", "client_ip", "created_at"),
+        Index("mobile_incidents_text_hash_time", "normalized_text_hash", "created_at"),
+    )
+
 
 class MobileDispatchAttempt(Base):
     __tablename__ = "mobile_dispatch_attempts"
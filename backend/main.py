@@ -2,10 +2,11 @@ import os
 from pathlib import Path
 
 import uvicorn
-from database import Base, engine
+from database import Base, backfill_defaults, engine, ensure_columns, ensure_indexes
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 # Import routes
@@ -21,6 +22,7 @@ from routes import division_routes
 from routes import emergency_routes
 from routes import flood_detection_routes
 from routes import mobile_routes
+from services.weather_verification_service import close_weather_client
 
 # Load environment variables (optional)
 try:
@@ -31,6 +33,9 @@ except:
 # Try to create database tables
 try:
     Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    backfill_defaults()
+    ensure_indexes()
     print("Database tables created successfully")
 except Exception as e:
     print(f"Warning: Could not create database tables: {e}")
@@ -39,7 +44,8 @@ except Exception as e:
 app = FastAPI(
     title="Disaster Response Dashboard API",
     description="API for managing disaster response operations in Telangana",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -72,6 +78,10 @@ app.include_router(emergency_routes.router, prefix="/api/emergency", tags=["Emer
 app.include_router(flood_detection_routes.router, prefix="/api/flood-detection", tags=["Flood Detection"], dependencies=admin_dep)
 app.include_router(mobile_routes.router, prefix="/api/mobile", tags=["Mobile Intake"])
 
+@app.on_event("shutdown")
+async def shutdown():
+    await close_weather_client()
+
 @app.get("/")
 async def root():
     return {"message": "Disaster Response Dashboard API", "status": "running"}
@@ -5,6 +5,7 @@ from typing import List, Optional
 from database import get_db, Division, Organization, Staff, SOSRequest
 from models import DivisionCreate, DivisionUpdate, DivisionResponse
 from routes.auth_routes import require_roles
+from services.workload_service import apply_load_status
 import uuid
 from datetime import datetime, timedelta
 
@@ -85,12 +86,7 @@ async def update_division(
         setattr(division, field, value)
     
     # Update status based on load
-    if division.current_load >= division.capacity:
-        division.status = "Overloaded"
-    elif division.current_load > 0:
-        division.status = "Active"
-    else:
-        division.status = "Available"
+    apply_load_status(division)
     
     db.commit()
     db.refresh(division)
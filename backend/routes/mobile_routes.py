@@ -18,7 +18,7 @@ from database import (
 )
 from services.gemini_service import gemini_chat_followup_response, gemini_transcribe_audio
 from services.mobile_ai_pipeline_service import build_ai_incident_bundle
-from services.mobile_dispatch_service import dispatch_ticket_with_retry
+from services.mobile_dispatch_service import dispatch_retry_in_flight, dispatch_ticket_with_retry
 
 router = APIRouter()
 
@@ -261,7 +261,7 @@ async def create_mobile_ticket(
         "audio": saved_audio,
     }
 
-    ai_bundle = build_ai_incident_bundle(
+    ai_bundle = await build_ai_incident_bundle(
         db=db,
         metadata=metadata_json,
         media_manifest=media_manifest,
@@ -291,6 +291,7 @@ async def create_mobile_ticket(
         description_summary=ai_bundle["summary"],
         device_id_hash=ai_bundle["device_id_hash"],
         client_ip=(request.client.host if request.client else ""),
+        normalized_text_hash=ai_bundle["normalized_text_hash"],
         media_manifest=ai_bundle["media_manifest_json"],
         normalized_payload=json.dumps(ai_bundle["normalized_payload"]),
         verification_payload=json.dumps(ai_bundle["verification_payload"]),
@@ -372,6 +373,7 @@ async def create_mobile_ticket(
             "endpoint": endpoint,
             "status_code": dispatch_result.get("status_code"),
             "error": dispatch_result.get("error"),
+            "retry_scheduled": dispatch_result.get("retry_scheduled", False),
         },
         "reassurance_message": reassurance_message,
     }
@@ -488,6 +490,8 @@ async def retry_pending_dispatch(
     success = 0
     failed = 0
     for incident in items:
+        if dispatch_retry_in_flight(incident.id):
+            continue
         payload_text = incident.dispatch_payload or "{}"
         try:
             payload = json.loads(payload_text)
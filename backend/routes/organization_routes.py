@@ -5,6 +5,7 @@ from typing import List, Optional
 from database import get_db, Organization, Division, Staff, SOSRequest
 from models import OrganizationCreate, OrganizationUpdate, OrganizationResponse, OrganizationDashboardStats
 from routes.auth_routes import require_roles
+from services.workload_service import apply_load_status
 import uuid
 from datetime import datetime
 
@@ -83,12 +84,7 @@ async def update_organization(
         setattr(org, field, value)
     
     # Update status based on load
-    if org.current_load >= org.capacity:
-        org.status = "Overloaded"
-    elif org.current_load > 0:
-        org.status = "Active"
-    else:
-        org.status = "Available"
+    apply_load_status(org)
     
     db.commit()
     db.refresh(org)
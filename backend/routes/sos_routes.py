@@ -1,23 +1,129 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
-from typing import List, Optional
+from sqlalchemy import bindparam, case, func, select, text
+from typing import Any, Callable, Dict, Optional, Tuple
 import math
+import time
 from datetime import datetime
 from types import SimpleNamespace
 
 from database import get_db, SOSRequest, Organization, Staff, Division, TicketUpdate
-from models import SOSRequestCreate, SOSRequestUpdate, SOSRequestResponse, SOSMapData, TicketUpdateCreate, SOSIntakeRequest
+from models import SOSRequestCreate, SOSRequestUpdate, SOSRequestResponse, TicketUpdateCreate, SOSIntakeRequest
 import uuid
 from database import Shelter, Hospital
 from routes.auth_routes import require_roles
 from services.assignment_service import recommend_assignment
-from services.geo_utils import infer_telangana_anchor
+from services.geo_utils import infer_telangana_anchor, rank_key
 from services.triage_service import triage_sos
 from services.workload_service import release_assignment_workload, transfer_assignment_workload
 
 router = APIRouter()
 
+# Column projections for read-only list endpoints. Rows are trusted DB output,
+# so they are returned as plain dicts instead of round-tripping through Pydantic.
+SOS_RESPONSE_COLUMNS = (
+    SOSRequest.id,
+    SOSRequest.external_id,
+    SOSRequest.status,
+    SOSRequest.people,
+    SOSRequest.longitude,
+    SOSRequest.latitude,
+    SOSRequest.text,
+    SOSRequest.place,
+    SOSRequest.category,
+    SOSRequest.priority,
+    SOSRequest.assigned_to,
+    SOSRequest.assigned_organization,
+    SOSRequest.assigned_division,
+    SOSRequest.notes,
+    SOSRequest.timestamp,
+    SOSRequest.estimated_completion,
+    SOSRequest.actual_completion,
+    SOSRequest.created_at,
+    SOSRequest.updated_at,
+)
+SOS_MAP_COLUMNS = (
+    SOSRequest.id,
+    SOSRequest.longitude,
+    SOSRequest.latitude,
+    SOSRequest.status,
+    SOSRequest.category,
+    SOSRequest.priority,
+    SOSRequest.people,
+    SOSRequest.place,
+)
+TICKET_UPDATE_COLUMNS = (
+    TicketUpdate.id,
+    TicketUpdate.ticket_id,
+    TicketUpdate.updated_by,
+    TicketUpdate.field_name,
+    TicketUpdate.old_value,
+    TicketUpdate.new_value,
+    TicketUpdate.update_time,
+    TicketUpdate.notes,
+)
+
+TELANGANA_REGION_BANDS = (
+    ("South Telangana", 77.0, 78.4),
+    ("Central Telangana", 78.4, 79.6),
+    ("North Telangana", 79.6, 81.0),
+)
+
+
+def _region_aggregates():
+    # Count and sum every region in a single scan. Bands share their edge
+    # longitudes, so each region keeps its own inclusive condition.
+    aggregates = []
+    for _, west_lon, east_lon in TELANGANA_REGION_BANDS:
+        in_region = SOSRequest.longitude.between(west_lon, east_lon)
+        aggregates.append(func.coalesce(func.sum(case((in_region, 1), else_=0)), 0))
+        aggregates.append(func.coalesce(func.sum(case((in_region, SOSRequest.people), else_=0)), 0))
+    return aggregates
+
+
+# Statements for hot read paths are built once at import. Handlers only bind
+# parameters, and SQLAlchemy reuses the compiled SQL from its statement cache.
+SOS_BY_ID_STMT = select(SOSRequest).where(SOSRequest.id == bindparam("sos_id"))
+TICKET_UPDATES_STMT = (
+    select(*TICKET_UPDATE_COLUMNS)
+    .where(TicketUpdate.ticket_id == bindparam("ticket_id"))
+    .order_by(TicketUpdate.update_time.desc())
+)
+# One scan with conditional aggregates instead of one query per figure.
+SOS_SUMMARY_STMT = select(
+    func.count(SOSRequest.id),
+    func.coalesce(func.sum(case((SOSRequest.status == "Pending", 1), else_=0)), 0),
+    func.coalesce(func.sum(case((SOSRequest.status == "In Progress", 1), else_=0)), 0),
+    func.coalesce(func.sum(case((SOSRequest.status == "Done", 1), else_=0)), 0),
+    func.coalesce(func.sum(SOSRequest.people), 0),
+)
+SOS_BY_CATEGORY_STMT = select(
+    SOSRequest.category,
+    func.count(SOSRequest.id).label('count'),
+    func.coalesce(func.sum(SOSRequest.people), 0).label('people_affected'),
+).group_by(SOSRequest.category)
+SOS_BY_REGION_STMT = select(*_region_aggregates())
+
+
+def _get_sos_by_id(db: Session, sos_id: str) -> Optional[SOSRequest]:
+    return db.execute(SOS_BY_ID_STMT, {"sos_id": sos_id}).scalar_one_or_none()
+
+# Dashboard stats are polled by every open tab. Serve them from a short-lived
+# per-process cache so concurrent pollers share one set of aggregate queries.
+STATS_CACHE_TTL_SECONDS = 5.0
+_STATS_CACHE: Dict[str, Tuple[float, Any]] = {}
+
+
+def _cached_stats(key: str, compute: Callable[[], Any]) -> Any:
+    now = time.monotonic()
+    entry = _STATS_CACHE.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+    value = compute()
+    _STATS_CACHE[key] = (now + STATS_CACHE_TTL_SECONDS, value)
+    return value
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two coordinates using Haversine formula"""
     R = 6371  # Earth's radius in kilometers
@@ -38,18 +144,12 @@ def find_nearest_organization(sos_lat, sos_lon, db: Session):
     if not organizations:
         return None
     
-    nearest_org = None
-    min_distance = float('inf')
-    
-    for org in organizations:
-        org_lat, org_lon = infer_telangana_anchor(f"{org.name or ''} {org.address or ''}")
-        
-        distance = calculate_distance(sos_lat, sos_lon, org_lat, org_lon)
-        if distance < min_distance:
-            min_distance = distance
-            nearest_org = org
-    
-    return nearest_org
+    # Only the argmin matters here, so rank with the cheap equirectangular key.
+    rank = rank_key(sos_lat, sos_lon)
+    return min(
+        organizations,
+        key=lambda org: rank(*infer_telangana_anchor(f"{org.name or ''} {org.address or ''}")),
+    )
 
 def find_nearest_staff(sos_lat, sos_lon, category, db: Session):
     """Find the nearest available staff member for the SOS request"""
@@ -77,18 +177,11 @@ def find_nearest_staff(sos_lat, sos_lon, category, db: Session):
     if not available_staff:
         return None
     
-    nearest_staff = None
-    min_distance = float('inf')
-    
-    for staff in available_staff:
-        staff_lat, staff_lon = infer_telangana_anchor(staff.current_location or staff.name)
-        
-        distance = calculate_distance(sos_lat, sos_lon, staff_lat, staff_lon)
-        if distance < min_distance:
-            min_distance = distance
-            nearest_staff = staff
-    
-    return nearest_staff
+    rank = rank_key(sos_lat, sos_lon)
+    return min(
+        available_staff,
+        key=lambda staff: rank(*infer_telangana_anchor(staff.current_location or staff.name)),
+    )
 
 @router.post("/intake")
 async def intake_sos_request(
@@ -147,7 +240,6 @@ async def intake_sos_request(
                 f"division_type={triage.get('division_type')}; urgency={triage['urgency_level']}; "
                 f"confidence={triage['confidence']}"
             ),
-            timestamp=datetime.utcnow(),
         )
 
         db.add(db_sos)
@@ -215,7 +307,6 @@ async def create_sos_request(
                 f"triage_source={triage.get('source','rules')}; division_type={triage.get('division_type')}; "
                 f"urgency={triage['urgency_level']}; confidence={triage['confidence']}"
             ),
-            timestamp=datetime.utcnow()
         )
         
         db.add(db_sos)
@@ -243,7 +334,7 @@ async def create_sos_request(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating SOS request: {str(e)}")
 
-@router.get("/", response_model=List[SOSRequestResponse])
+@router.get("/", response_class=ORJSONResponse)
 async def get_sos_requests(
     status: Optional[str] = Query(None, description="Filter by status"),
     category: Optional[str] = Query(None, description="Filter by category"),
@@ -254,7 +345,7 @@ async def get_sos_requests(
     db: Session = Depends(get_db)
 ):
     """Get SOS requests with filtering options"""
-    query = db.query(SOSRequest)
+    query = db.query(*SOS_RESPONSE_COLUMNS)
     
     if status:
         query = query.filter(SOSRequest.status == status)
@@ -275,15 +366,15 @@ async def get_sos_requests(
     query = query.order_by(SOSRequest.priority.desc(), SOSRequest.created_at.desc())
     query = query.offset(offset).limit(limit)
     
-    return query.all()
+    return ORJSONResponse([row._asdict() for row in query.all()])
 
-@router.get("/map", response_model=List[SOSMapData])
+@router.get("/map", response_class=ORJSONResponse)
 async def get_sos_map_data(
     bounds: Optional[str] = Query(None, description="Map bounds: north,south,east,west"),
     db: Session = Depends(get_db)
 ):
     """Get SOS data for map visualization"""
-    query = db.query(SOSRequest).filter(SOSRequest.status != "Done")
+    query = db.query(*SOS_MAP_COLUMNS).filter(SOSRequest.status != "Done")
     
     if bounds:
         try:
@@ -298,26 +389,12 @@ async def get_sos_map_data(
         except ValueError:
             pass
     
-    sos_requests = query.all()
-    
-    return [
-        SOSMapData(
-            id=str(sos.id),
-            longitude=sos.longitude,
-            latitude=sos.latitude,
-            status=sos.status,
-            category=sos.category,
-            priority=sos.priority,
-            people=sos.people,
-            place=sos.place
-        )
-        for sos in sos_requests
-    ]
+    return ORJSONResponse([row._asdict() for row in query.all()])
 
 @router.get("/{sos_id}", response_model=SOSRequestResponse)
 async def get_sos_request(sos_id: str, db: Session = Depends(get_db)):
     """Get a specific SOS request by ID"""
-    sos = db.query(SOSRequest).filter(SOSRequest.id == sos_id).first()
+    sos = _get_sos_by_id(db, sos_id)
     if not sos:
         raise HTTPException(status_code=404, detail="SOS request not found")
     
@@ -332,12 +409,12 @@ async def update_sos_request(
 ):
     """Update an SOS request status and assignment"""
     # Try to find by string ID first, then by UUID
-    sos = db.query(SOSRequest).filter(SOSRequest.id == sos_id).first()
+    sos = _get_sos_by_id(db, sos_id)
     
     if not sos:
         try:
             sos_uuid = uuid.UUID(sos_id)
-            sos = db.query(SOSRequest).filter(SOSRequest.id == sos_uuid).first()
+            sos = _get_sos_by_id(db, str(sos_uuid))
         except ValueError:
             pass
     
@@ -363,34 +440,23 @@ async def update_sos_request(
     reactivated = old_status in ["Done", "Cancelled"] and sos.status not in ["Done", "Cancelled"]
 
     # Ensure workload counters follow assignment lifecycle.
+    # Assignments are compared as (org, division, staff) tuples so the common
+    # "no assignment change" path is a single comparison.
+    new_assignment = (sos.assigned_organization, sos.assigned_division, sos.assigned_to)
+    old_assignment = (old_assigned_org, old_assigned_div, old_assigned_to)
     if completed_now or cancelled_now:
-        release_assignment_workload(db, sos.assigned_organization, sos.assigned_division, sos.assigned_to)
-    elif reactivated and (sos.assigned_organization or sos.assigned_division or sos.assigned_to):
-        transfer_assignment_workload(
-            db,
-            old_org_id=None,
-            old_division_id=None,
-            old_staff_id=None,
-            new_org_id=sos.assigned_organization,
-            new_division_id=sos.assigned_division,
-            new_staff_id=sos.assigned_to,
-            sos_id=str(sos.id),
-        )
-    elif (
-        old_assigned_org != sos.assigned_organization
-        or old_assigned_div != sos.assigned_division
-        or old_assigned_to != sos.assigned_to
-    ):
-        transfer_assignment_workload(
-            db,
-            old_org_id=old_assigned_org,
-            old_division_id=old_assigned_div,
-            old_staff_id=old_assigned_to,
-            new_org_id=sos.assigned_organization,
-            new_division_id=sos.assigned_division,
-            new_staff_id=sos.assigned_to,
-            sos_id=str(sos.id),
-        )
+        release_assignment_workload(db, *new_assignment)
+    else:
+        if reactivated and any(new_assignment):
+            # Released on completion/cancellation, so count the assignment afresh.
+            transfer_from = (None, None, None)
+        elif new_assignment != old_assignment:
+            transfer_from = old_assignment
+        else:
+            transfer_from = None
+
+        if transfer_from is not None:
+            transfer_assignment_workload(db, *transfer_from, *new_assignment, sos_id=str(sos.id))
 
     # Update completion time if status changed to Done
     if sos.status == "Done" and old_status != "Done":
@@ -448,7 +514,7 @@ async def delete_sos_request(
     current_user = Depends(require_roles("admin")),
 ):
     """Delete an SOS request (admin only)"""
-    sos = db.query(SOSRequest).filter(SOSRequest.id == sos_id).first()
+    sos = _get_sos_by_id(db, sos_id)
     if not sos:
         raise HTTPException(status_code=404, detail="SOS request not found")
 
@@ -460,75 +526,52 @@ async def delete_sos_request(
     
     return {"message": "SOS request deleted successfully"}
 
-@router.get("/stats/summary")
+@router.get("/stats/summary", response_class=ORJSONResponse)
 async def get_sos_summary(db: Session = Depends(get_db)):
     """Get summary statistics for SOS requests"""
-    total = db.query(func.count(SOSRequest.id)).scalar()
-    pending = db.query(func.count(SOSRequest.id)).filter(SOSRequest.status == "Pending").scalar()
-    in_progress = db.query(func.count(SOSRequest.id)).filter(SOSRequest.status == "In Progress").scalar()
-    completed = db.query(func.count(SOSRequest.id)).filter(SOSRequest.status == "Done").scalar()
-    total_people = db.query(func.sum(SOSRequest.people)).scalar() or 0
-    
-    return {
-        "total_requests": total,
-        "pending": pending,
-        "in_progress": in_progress,
-        "completed": completed,
-        "total_people_affected": total_people
-    }
-
-@router.get("/stats/by-category")
+    def compute():
+        total, pending, in_progress, completed, total_people = db.execute(SOS_SUMMARY_STMT).one()
+
+        return {
+            "total_requests": total,
+            "pending": pending,
+            "in_progress": in_progress,
+            "completed": completed,
+            "total_people_affected": total_people
+        }
+
+    return _cached_stats("summary", compute)
+
+@router.get("/stats/by-category", response_class=ORJSONResponse)
 async def get_sos_by_category(db: Session = Depends(get_db)):
     """Get SOS requests grouped by category"""
-    result = db.query(
-        SOSRequest.category,
-        func.count(SOSRequest.id).label('count'),
-        func.sum(SOSRequest.people).label('people_affected')
-    ).group_by(SOSRequest.category).all()
-    
-    return [
-        {
-            "category": item.category,
-            "count": item.count,
-            "people_affected": item.people_affected or 0
-        }
-        for item in result
-    ]
+    def compute():
+        return [dict(row) for row in db.execute(SOS_BY_CATEGORY_STMT).mappings()]
+
+    return _cached_stats("by-category", compute)
 
-@router.get("/stats/by-region")
+@router.get("/stats/by-region", response_class=ORJSONResponse)
 async def get_sos_by_region(db: Session = Depends(get_db)):
     """Get SOS requests grouped by region"""
-    regions = [
-        ("South Telangana", 77.0, 78.4),
-        ("Central Telangana", 78.4, 79.6),
-        ("North Telangana", 79.6, 81.0)
-    ]
-    
-    region_stats = []
-    for region_name, west_lon, east_lon in regions:
-        count = db.query(func.count(SOSRequest.id)).filter(
-            SOSRequest.longitude >= west_lon,
-            SOSRequest.longitude <= east_lon
-        ).scalar()
-        
-        people = db.query(func.sum(SOSRequest.people)).filter(
-            SOSRequest.longitude >= west_lon,
-            SOSRequest.longitude <= east_lon
-        ).scalar() or 0
-        
-        region_stats.append({
-            "region": region_name,
-            "sos_count": count,
-            "people_affected": people
-        })
-    
-    return region_stats
-
-@router.get("/{sos_id}/updates")
+    def compute():
+        row = db.execute(SOS_BY_REGION_STMT).one()
+        return [
+            {
+                "region": region_name,
+                "sos_count": row[2 * index],
+                "people_affected": row[2 * index + 1]
+            }
+            for index, (region_name, _, _) in enumerate(TELANGANA_REGION_BANDS)
+        ]
+
+    return _cached_stats("by-region", compute)
+
+@router.get("/{sos_id}/updates", response_class=ORJSONResponse)
 async def get_ticket_updates(sos_id: str, db: Session = Depends(get_db)):
     """Get update history for a specific SOS request"""
-    updates = db.query(TicketUpdate).filter(TicketUpdate.ticket_id == str(sos_id)).order_by(TicketUpdate.update_time.desc()).all()
-    return updates
+    # Served by the (ticket_id, update_time DESC) index; no sort step.
+    updates = db.execute(TICKET_UPDATES_STMT, {"ticket_id": str(sos_id)}).mappings()
+    return ORJSONResponse([dict(row) for row in updates])
 
 @router.post("/{sos_id}/assign")
 async def assign_sos_request(
@@ -538,7 +581,7 @@ async def assign_sos_request(
     current_user = Depends(require_roles("admin", "responder")),
 ):
     """Manually assign an SOS request to organization/staff"""
-    sos = db.query(SOSRequest).filter(SOSRequest.id == sos_id).first()
+    sos = _get_sos_by_id(db, sos_id)
     if not sos:
         raise HTTPException(status_code=404, detail="SOS request not found")
     
@@ -603,7 +646,7 @@ async def get_nearest_facilities(
         sos_request = None
         try:
             # Try to find by UUID first
-            sos_request = db.query(SOSRequest).filter(SOSRequest.id == sos_id).first()
+            sos_request = _get_sos_by_id(db, sos_id)
         except:
             # If UUID fails, try to find by string ID
             sos_request = db.query(SOSRequest).filter(SOSRequest.external_id == sos_id).first()
@@ -1,23 +1,30 @@
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
-from services.geo_utils import haversine_km, infer_telangana_anchor
+import numpy as np
 
+from services.geo_utils import haversine_km_many, infer_telangana_anchor
 
-def _safe_ratio(numerator: float, denominator: float) -> float:
-    if denominator <= 0:
-        return 0.0
-    return max(0.0, min(1.0, numerator / denominator))
+# Best candidate plus three alternatives per group.
+TOP_CANDIDATES = 4
+
+
+@lru_cache(maxsize=4096)
+def _tokenize(value: str) -> Tuple[str, FrozenSet[str]]:
+    # Category/type/skill strings repeat across every SOS, so the lowered form
+    # and token set are computed once per distinct string.
+    lowered = value.lower()
+    return lowered, frozenset(lowered.split())
 
 
 def _category_match_score(category: str, target: str) -> float:
-    c1 = (category or "").lower()
-    c2 = (target or "").lower()
-    if not c1 or not c2:
+    if not category or not target:
         return 0.3
+    c1, c1_tokens = _tokenize(category)
+    c2, c2_tokens = _tokenize(target)
     if c1 in c2 or c2 in c1:
         return 1.0
-    token_overlap = len(set(c1.split()) & set(c2.split()))
-    return 0.6 if token_overlap > 0 else 0.3
+    return 0.6 if c1_tokens & c2_tokens else 0.3
 
 
 def _infer_division_type(category: str) -> str:
@@ -31,16 +38,97 @@ def _infer_division_type(category: str) -> str:
     return "Rescue"
 
 
+def _capacity_scores(capacity: np.ndarray, load: np.ndarray) -> np.ndarray:
+    # Spare-capacity ratio clamped to 0..1; zero capacity is scored against 1.
+    denominator = np.where(capacity == 0, 1.0, capacity)
+    ratio = np.divide(capacity - load, denominator, out=np.zeros_like(capacity), where=denominator > 0)
+    return np.clip(ratio, 0.0, 1.0)
+
+
+def _distance_kernel(
+    sos_lat: float,
+    sos_lon: float,
+    anchors: np.ndarray,
+    out_dist: np.ndarray,
+    out_score: np.ndarray,
+) -> None:
+    # Fill distance (km) and distance score (1 at the SOS, 0 beyond 250 km)
+    # in place, without intermediate arrays.
+    haversine_km_many(sos_lat, sos_lon, anchors[:, 0], anchors[:, 1], out=out_dist)
+    np.divide(out_dist, 250.0, out=out_score)
+    np.minimum(out_score, 1.0, out=out_score)
+    np.subtract(1.0, out_score, out=out_score)
+    np.maximum(out_score, 0.0, out=out_score)
+
+
+def _top_indices(scores: np.ndarray, k: int = TOP_CANDIDATES) -> np.ndarray:
+    """Indices of the k best scores, best first, ties kept in input order."""
+    if len(scores) > k:
+        # Partition finds the k-th best score; everything at least that good is
+        # a candidate (ties may add a few), and only those get sorted.
+        negated = -scores
+        threshold = np.partition(negated, k - 1)[k - 1]
+        candidates = np.flatnonzero(negated <= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order[:k]]
+
+
+# Anchors depend only on the entity's own text fields, so they are memoized on
+# those fields. An edit to name/address/location simply misses the cache.
+@lru_cache(maxsize=4096)
+def _org_anchor_for(name: Optional[str], address: Optional[str]) -> Tuple[float, float]:
+    return infer_telangana_anchor(f"{name or ''} {address or ''}")
+
+
+@lru_cache(maxsize=4096)
+def _staff_anchor_for(current_location: Optional[str], name: Optional[str]) -> Tuple[float, float]:
+    return infer_telangana_anchor(f"{current_location or ''} {name or ''}")
+
+
 def _org_anchor(org) -> tuple[float, float]:
     # Organization does not have explicit coordinates in the current schema.
     # Infer anchor coordinate from address/name for Telangana-aware distance.
-    seed_text = f"{org.name or ''} {org.address or ''}"
-    return infer_telangana_anchor(seed_text)
+    return _org_anchor_for(org.name, org.address)
 
 
 def _staff_anchor(staff) -> tuple[float, float]:
-    seed_text = f"{staff.current_location or ''} {staff.name or ''}"
-    return infer_telangana_anchor(seed_text)
+    return _staff_anchor_for(staff.current_location, staff.name)
+
+
+@lru_cache(maxsize=4096)
+def _skill_tokens(skills: str) -> FrozenSet[str]:
+    # Skills are stored comma-separated ("medical,trauma,first aid"). A required
+    # skill matches a whole phrase or any word inside one.
+    phrases = [phrase.strip(" \"'[]") for phrase in skills.lower().split(",")]
+    tokens = {phrase for phrase in phrases if phrase}
+    for phrase in phrases:
+        tokens.update(phrase.split())
+    return frozenset(tokens)
+
+
+def _skill_score(person, required_skills: List[str], desired_division_type: str) -> float:
+    skills = person.skills or ""
+    if required_skills:
+        tokens = _skill_tokens(skills)
+        matched = sum(1 for skill in required_skills if skill in tokens)
+        return max(0.3, min(1.0, matched / max(1, len(required_skills))))
+    return _category_match_score(skills, desired_division_type)
+
+
+def _empty_recommendation(assignment_context: Dict) -> Dict:
+    """Recommendation with no candidates, same shape as a scored one."""
+    return {
+        "recommended_assignment": {
+            "organization": None,
+            "staff": None,
+            "division": None,
+            "alternatives": {"organizations": [], "staff": [], "divisions": []},
+        },
+        "assignment_score": 0.0,
+        "assignment_context": assignment_context,
+    }
 
 
 def recommend_assignment(
@@ -53,90 +141,119 @@ def recommend_assignment(
     """
     Score and return the best organization, staff, and division for an SOS.
     """
-    sos_lat = float(sos.latitude)
-    sos_lon = float(sos.longitude)
     sos_category = sos.category or ""
     triage_context = triage_context or {}
     desired_division_type = triage_context.get("division_type") or _infer_division_type(sos_category)
-    required_skills = [s.lower() for s in (triage_context.get("required_skills") or []) if s]
-    assignment_basis = triage_context.get("source", "rules")
+    required_skills = [skill for s in (triage_context.get("required_skills") or []) if (skill := str(s).strip().lower())]
+    assignment_context = {
+        "desired_division_type": desired_division_type,
+        "required_skills": required_skills,
+        "basis": triage_context.get("source", "rules"),
+    }
+
+    if not (organizations or staff_members or divisions):
+        return _empty_recommendation(assignment_context)
+    # Organizations and staff are ranked by distance; without a usable SOS
+    # location only divisions, which are ranked on capacity and type, are scored.
+    try:
+        sos_lat = float(sos.latitude)
+        sos_lon = float(sos.longitude)
+        located = True
+    except (TypeError, ValueError):
+        located = False
+
+    # Candidates are packed into parallel arrays so distance, capacity and the
+    # weighted totals are computed for the whole fleet in a few array ops.
+    orgs = [
+        org for org in (organizations if located else ())
+        if (org.status or "").lower() != "inactive"
+        and not (org.capacity and org.current_load is not None and org.current_load >= org.capacity)
+    ]
+    staff = [
+        person for person in (staff_members if located else ())
+        if (person.status or "").lower() == "active" and (person.availability or "").lower() == "available"
+    ]
+    # Distance buffers are shared by the organization and staff passes.
+    distance_buffer = np.empty(max(len(orgs), len(staff)), dtype=np.float64)
+    distance_score_buffer = np.empty_like(distance_buffer)
 
     ranked_orgs = []
-    for org in organizations:
-        if (org.status or "").lower() == "inactive":
-            continue
-        if org.capacity and org.current_load is not None and org.current_load >= org.capacity:
-            continue
-
-        lat, lon = _org_anchor(org)
-        distance_km = haversine_km(sos_lat, sos_lon, lat, lon)
-        distance_score = max(0.0, 1 - min(distance_km / 250.0, 1))
-        capacity_score = _safe_ratio((org.capacity or 0) - (org.current_load or 0), (org.capacity or 1))
-        category_score = _category_match_score(org.category, desired_division_type)
-        total_score = (0.45 * distance_score) + (0.30 * capacity_score) + (0.25 * category_score)
-
-        ranked_orgs.append({
-            "id": str(org.id),
-            "name": org.name,
-            "type": org.type,
-            "category": org.category,
-            "contact_person": org.contact_person,
-            "contact_phone": org.contact_phone,
-            "distance_km": round(distance_km, 2),
-            "estimated_response_time": round(max(5.0, distance_km * 2.5), 1),
-            "score": round(total_score * 100, 1),
-        })
-
-    ranked_orgs.sort(key=lambda x: x["score"], reverse=True)
+    if orgs:
+        anchors = np.array([_org_anchor(org) for org in orgs], dtype=np.float64)
+        capacity = np.array([org.capacity or 0 for org in orgs], dtype=np.float64)
+        load = np.array([org.current_load or 0 for org in orgs], dtype=np.float64)
+        category_score = np.array(
+            [_category_match_score(org.category, desired_division_type) for org in orgs], dtype=np.float64
+        )
+        distance_km = distance_buffer[:len(orgs)]
+        distance_score = distance_score_buffer[:len(orgs)]
+        _distance_kernel(sos_lat, sos_lon, anchors, distance_km, distance_score)
+        total_score = (
+            (0.45 * distance_score)
+            + (0.30 * _capacity_scores(capacity, load))
+            + (0.25 * category_score)
+        )
+        scores = np.round(total_score * 100, 1)
+
+        for i in _top_indices(scores):
+            org = orgs[i]
+            distance = float(distance_km[i])
+            ranked_orgs.append({
+                "id": str(org.id),
+                "name": org.name,
+                "type": org.type,
+                "category": org.category,
+                "contact_person": org.contact_person,
+                "contact_phone": org.contact_phone,
+                "distance_km": round(distance, 2),
+                "estimated_response_time": round(max(5.0, distance * 2.5), 1),
+                "score": float(scores[i]),
+            })
 
     ranked_staff = []
-    for person in staff_members:
-        if (person.status or "").lower() != "active":
-            continue
-        if (person.availability or "").lower() != "available":
-            continue
-
-        lat, lon = _staff_anchor(person)
-        distance_km = haversine_km(sos_lat, sos_lon, lat, lon)
-        distance_score = max(0.0, 1 - min(distance_km / 250.0, 1))
-        skills = (person.skills or "").lower()
-        if required_skills:
-            matched = sum(1 for skill in required_skills if skill in skills)
-            skill_score = max(0.3, min(1.0, matched / max(1, len(required_skills))))
-        else:
-            skill_score = _category_match_score(skills, desired_division_type)
+    if staff:
+        anchors = np.array([_staff_anchor(person) for person in staff], dtype=np.float64)
+        skill_score = np.array([_skill_score(person, required_skills, desired_division_type) for person in staff])
+        distance_km = distance_buffer[:len(staff)]
+        distance_score = distance_score_buffer[:len(staff)]
+        _distance_kernel(sos_lat, sos_lon, anchors, distance_km, distance_score)
         total_score = (0.55 * distance_score) + (0.45 * skill_score)
+        scores = np.round(total_score * 100, 1)
 
-        ranked_staff.append({
-            "id": str(person.id),
-            "name": person.name,
-            "role": person.role,
-            "skills": person.skills,
-            "distance_km": round(distance_km, 2),
-            "score": round(total_score * 100, 1),
-        })
-
-    ranked_staff.sort(key=lambda x: x["score"], reverse=True)
+        for i in _top_indices(scores):
+            person = staff[i]
+            ranked_staff.append({
+                "id": str(person.id),
+                "name": person.name,
+                "role": person.role,
+                "skills": person.skills,
+                "distance_km": round(float(distance_km[i]), 2),
+                "score": float(scores[i]),
+            })
 
+    divs = [
+        div for div in divisions
+        if (div.status or "").lower() != "inactive"
+        and not (div.capacity and div.current_load is not None and div.current_load >= div.capacity)
+    ]
     ranked_divisions = []
-    for div in divisions:
-        if (div.status or "").lower() == "inactive":
-            continue
-        if div.capacity and div.current_load is not None and div.current_load >= div.capacity:
-            continue
+    if divs:
+        capacity = np.array([div.capacity or 0 for div in divs], dtype=np.float64)
+        load = np.array([div.current_load or 0 for div in divs], dtype=np.float64)
+        type_score = np.array(
+            [_category_match_score(div.type, desired_division_type) for div in divs], dtype=np.float64
+        )
+        total_score = (0.65 * _capacity_scores(capacity, load)) + (0.35 * type_score)
+        scores = np.round(total_score * 100, 1)
 
-        capacity_score = _safe_ratio((div.capacity or 0) - (div.current_load or 0), (div.capacity or 1))
-        type_score = _category_match_score(div.type, desired_division_type)
-        total_score = (0.65 * capacity_score) + (0.35 * type_score)
-
-        ranked_divisions.append({
-            "id": str(div.id),
-            "name": div.name,
-            "type": div.type,
-            "score": round(total_score * 100, 1),
-        })
-
-    ranked_divisions.sort(key=lambda x: x["score"], reverse=True)
+        for i in _top_indices(scores):
+            div = divs[i]
+            ranked_divisions.append({
+                "id": str(div.id),
+                "name": div.name,
+                "type": div.type,
+                "score": float(scores[i]),
+            })
 
     best_org = ranked_orgs[0] if ranked_orgs else None
     best_staff = ranked_staff[0] if ranked_staff else None
@@ -162,9 +279,5 @@ def recommend_assignment(
             },
         },
         "assignment_score": overall,
-        "assignment_context": {
-            "desired_division_type": desired_division_type,
-            "required_skills": required_skills,
-            "basis": assignment_basis,
-        },
+        "assignment_context": assignment_context,
     }
@@ -1,19 +1,96 @@
 import json
 import os
-import re
 import base64
+import hashlib
 import mimetypes
-import urllib.error
-import urllib.request
-from typing import Any, Dict, List, Optional
+import mmap
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import orjson
 
 
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}"
-GEMINI_MODELS_API = "https://generativelanguage.googleapis.com/v1beta/models?key={key}"
+# Partial response: only the two fields the candidate filter reads, which keeps
+# the catalog payload small as the model list grows.
+GEMINI_MODELS_API = (
+    "https://generativelanguage.googleapis.com/v1beta/models"
+    "?key={key}&pageSize=1000&fields=models(name,supportedGenerationMethods)"
+)
 DEFAULT_MODEL = "gemini-2.5-flash"
 FALLBACK_MODELS = ["gemini-2.5-flash", "gemini-2.0-flash", "gemini-flash-latest", "gemini-pro-latest"]
-ALLOWED_DIVISIONS = {"Rescue", "Medical", "Logistics", "Communication"}
+ALLOWED_DIVISIONS = frozenset({"Rescue", "Medical", "Logistics", "Communication"})
+# Lowercased model output -> canonical label, so one dict lookup both validates
+# and normalizes casing.
+_DIVISION_MAP = {division.lower(): division for division in ALLOWED_DIVISIONS}
+_URGENCY_MAP = {"critical": "Critical", "high": "High", "medium": "Medium", "low": "Low"}
+_URGENCY_DEFAULT = "Medium"
+# Hedged model attempts: candidates start one at a time in preference order, and
+# the next one starts only when the previous attempt fails or has used
+# GEMINI_HEDGE_DELAY_FRACTION of the call's timeout. At most GEMINI_RACE_WIDTH run
+# at once per call; a started request cannot be aborted, so hedging bounds the
+# duplicate traffic. Calls carrying inline media never hedge, only fall back.
+GEMINI_RACE_WIDTH = 3
+GEMINI_HEDGE_DELAY_FRACTION = float(os.getenv("GEMINI_HEDGE_DELAY_FRACTION", "0.5"))
 _MODEL_CACHE: Dict[str, List[str]] = {}
+# The models list is also kept on disk so restarts and sibling workers skip the
+# lookup. Entries are keyed by a hash of the API key, never the key itself.
+GEMINI_MODEL_CACHE_PATH = os.getenv(
+    "GEMINI_MODEL_CACHE_PATH", os.path.join(tempfile.gettempdir(), "aegis_gemini_models.json")
+)
+GEMINI_MODEL_CACHE_TTL_SECONDS = 24 * 3600
+_JSON_DECODER = json.JSONDecoder()
+# Parsed Gemini results by request digest: {digest: (expires_at, result)}, least
+# recently used first. Pool threads share it, so every access holds the lock.
+GEMINI_RESULT_CACHE_TTL_SECONDS = 3600.0
+GEMINI_RESULT_CACHE_MAX_ENTRIES = 512
+_RESULT_CACHE: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+_RESULT_CACHE_LOCK = threading.Lock()
+# Whether a model accepts generationConfig.thinkingConfig. Unknown models are
+# assumed to; a 400 mentioning thinking flips the flag for the process.
+_THINKING_SUPPORT: Dict[str, bool] = {
+    "gemini-2.5-flash": True,
+    "gemini-flash-latest": True,
+    "gemini-2.0-flash": False,
+}
+
+_TRIAGE_PROMPT_PREFIX = (
+    "You are an emergency triage AI for Telangana disaster response.\n"
+    "Classify incident and return STRICT JSON only with keys:\n"
+    "category (string), priority (1-5 int), division_type (one of Rescue, Medical, Logistics, Communication),\n"
+    "required_skills (array of short strings), urgency_level (Critical|High|Medium|Low), confidence (0-1 number).\n"
+    "No markdown, no prose.\n\n"
+)
+_NO_THINKING_CONFIG = b'"thinkingConfig":{"thinkingBudget":0}'
+
+# One pooled client for every Gemini call so the TLS handshake is paid once per
+# connection instead of once per request. Timeouts are set per call. It is built
+# on first use: loading the TLS context is the bulk of this module's import cost,
+# and processes without a Gemini key never need it.
+_HTTP: Optional[httpx.Client] = None
+_HTTP_LOCK = threading.Lock()
+# Sized for concurrent calls, not hedges: most calls hold one thread, and only
+# a slow primary model adds a second or third.
+_RACE_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="gemini")
+
+
+def _http() -> httpx.Client:
+    global _HTTP
+    if _HTTP is None:
+        with _HTTP_LOCK:
+            if _HTTP is None:
+                _HTTP = httpx.Client(
+                    http2=True,
+                    timeout=None,
+                    headers={"Content-Type": "application/json"},
+                    limits=httpx.Limits(max_keepalive_connections=10),
+                )
+    return _HTTP
 
 
 def _extract_json(raw_text: str) -> Optional[Dict[str, Any]]:
@@ -22,19 +99,20 @@ def _extract_json(raw_text: str) -> Optional[Dict[str, Any]]:
 
     # Try direct parse first.
     try:
-        data = json.loads(raw_text)
+        data = orjson.loads(raw_text)
         if isinstance(data, dict):
             return data
     except Exception:
         pass
 
-    # Fallback: pull first JSON object from text.
-    match = re.search(r"\{.*\}", raw_text, flags=re.DOTALL)
-    if not match:
+    # Fallback: decode the first JSON object embedded in the text (e.g. inside a
+    # markdown fence). raw_decode stops at the object's end in a single pass.
+    start = raw_text.find("{")
+    if start < 0:
         return None
 
     try:
-        data = json.loads(match.group(0))
+        data, _ = _JSON_DECODER.raw_decode(raw_text, start)
         if isinstance(data, dict):
             return data
     except Exception:
@@ -43,6 +121,10 @@ def _extract_json(raw_text: str) -> Optional[Dict[str, Any]]:
 
 
 def _clamp_priority(value: Any, fallback: int) -> int:
+    # Gemini almost always returns a plain JSON integer; skip the int() call
+    # and exception setup for that case.
+    if type(value) is int:
+        return 1 if value < 1 else 5 if value > 5 else value
     try:
         priority = int(value)
         return max(1, min(5, priority))
@@ -51,10 +133,7 @@ def _clamp_priority(value: Any, fallback: int) -> int:
 
 
 def _sanitize_division(value: Any, fallback: str) -> str:
-    text = str(value or "").strip().title()
-    if text in ALLOWED_DIVISIONS:
-        return text
-    return fallback
+    return _DIVISION_MAP.get(str(value or "").strip().lower(), fallback)
 
 
 def _normalize_model_name(model_name: str) -> str:
@@ -64,15 +143,78 @@ def _normalize_model_name(model_name: str) -> str:
     return raw
 
 
+def _model_cache_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def _read_model_cache_file() -> Dict[str, Any]:
+    try:
+        with open(GEMINI_MODEL_CACHE_PATH, "r", encoding="utf-8") as handle:
+            entries = json.load(handle)
+        return entries if isinstance(entries, dict) else {}
+    except Exception:
+        return {}
+
+
+def _is_fresh_model_entry(entry: Any, now: float) -> bool:
+    try:
+        return now - float(entry["fetched_at"]) < GEMINI_MODEL_CACHE_TTL_SECONDS and isinstance(entry["models"], list)
+    except Exception:
+        return False
+
+
+def _load_cached_models(api_key: str) -> Optional[List[str]]:
+    entry = _read_model_cache_file().get(_model_cache_key(api_key))
+    if not _is_fresh_model_entry(entry, time.time()):
+        return None
+    return [str(name) for name in entry["models"]]
+
+
+def _store_cached_models(api_key: str, models: List[str]) -> None:
+    now = time.time()
+    entries = {
+        key: entry for key, entry in _read_model_cache_file().items() if _is_fresh_model_entry(entry, now)
+    }
+    entries[_model_cache_key(api_key)] = {"fetched_at": now, "models": models}
+    tmp_path = None
+    try:
+        # A unique temp file per writer: pool threads in one process may store
+        # at the same time, so the process id alone is not enough.
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=os.path.dirname(os.path.abspath(GEMINI_MODEL_CACHE_PATH)),
+            prefix=os.path.basename(GEMINI_MODEL_CACHE_PATH) + ".",
+            suffix=".tmp",
+            delete=False,
+        ) as handle:
+            tmp_path = handle.name
+            json.dump(entries, handle)
+        # Atomic swap so concurrent workers never read a half-written file.
+        os.replace(tmp_path, GEMINI_MODEL_CACHE_PATH)
+    except Exception:
+        if tmp_path is None:
+            return
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
 def _fetch_models_supporting_generation(api_key: str, timeout_seconds: int = 5) -> List[str]:
     if api_key in _MODEL_CACHE:
         return _MODEL_CACHE[api_key]
 
+    cached = _load_cached_models(api_key)
+    if cached is not None:
+        _MODEL_CACHE[api_key] = cached
+        return cached
+
     url = GEMINI_MODELS_API.format(key=api_key)
-    req = urllib.request.Request(url=url, method="GET")
     try:
-        with urllib.request.urlopen(req, timeout=timeout_seconds) as response:
-            payload = json.loads(response.read().decode("utf-8"))
+        response = _http().get(url, timeout=timeout_seconds)
+        response.raise_for_status()
+        payload = orjson.loads(response.content)
     except Exception:
         _MODEL_CACHE[api_key] = []
         return []
@@ -88,31 +230,168 @@ def _fetch_models_supporting_generation(api_key: str, timeout_seconds: int = 5)
             candidates.append(name)
 
     _MODEL_CACHE[api_key] = candidates
+    if candidates:
+        _store_cached_models(api_key, candidates)
     return candidates
 
 
 def _model_candidates(api_key: str, explicit_model: Optional[str]) -> List[str]:
-    ordered: List[str] = []
-
-    def add(candidate: Optional[str]) -> None:
+    # dict keys keep insertion order and give O(1) duplicate checks.
+    ordered: Dict[str, None] = {}
+    for candidate in (explicit_model, *FALLBACK_MODELS):
         normalized = _normalize_model_name(candidate or "")
-        if normalized and normalized not in ordered:
-            ordered.append(normalized)
-
-    add(explicit_model)
-    for model in FALLBACK_MODELS:
-        add(model)
+        if normalized:
+            ordered[normalized] = None
 
     available = _fetch_models_supporting_generation(api_key)
     if not available:
-        return ordered
+        return list(ordered)
 
-    in_available = [m for m in ordered if m in available]
-    remaining = [m for m in available if m not in in_available and ("gemini" in m or "gemma" in m)]
+    available_set = set(available)
+    in_available = [m for m in ordered if m in available_set]
+    remaining = [m for m in available if m not in ordered and ("gemini" in m or "gemma" in m)]
     # Keep list bounded to avoid long retry chains in hot paths.
     return (in_available + remaining)[:8]
 
 
+def _body_variants(parts: List[Dict[str, Any]], temperature: float, max_output_tokens: int) -> List[bytes]:
+    """
+    Request bodies to try per model, serialized once per call rather than once per
+    model attempt: first with thinking disabled, then without thinkingConfig for
+    models that reject it.
+    """
+    contents = orjson.dumps([{"parts": parts}])
+    generation = (
+        b'"temperature":' + orjson.dumps(temperature) + b',"maxOutputTokens":' + orjson.dumps(int(max_output_tokens))
+    )
+    return [
+        b'{"contents":' + contents + b',"generationConfig":{' + generation + b"," + _NO_THINKING_CONFIG + b"}}",
+        b'{"contents":' + contents + b',"generationConfig":{' + generation + b"}}",
+    ]
+
+
+def _post_once(model: str, url: str, body: bytes, timeout_seconds: int, thinking: bool) -> Optional[Dict[str, Any]]:
+    try:
+        response = _http().post(url, content=body, timeout=timeout_seconds)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    except httpx.HTTPStatusError as exc:
+        # Remember models that reject thinkingConfig so later calls go
+        # straight to the plain body instead of repeating a doomed request.
+        if thinking and exc.response.status_code == 400 and "thinking" in exc.response.text.lower():
+            _THINKING_SUPPORT[model] = False
+        return None
+    except (httpx.HTTPError, json.JSONDecodeError):
+        return None
+
+
+def _try_model(
+    model: str,
+    api_key: str,
+    body_variants: List[bytes],
+    timeout_seconds: int,
+    extract: Callable[[Dict[str, Any]], Any],
+) -> Any:
+    payload = None
+    url = GEMINI_API_URL.format(model=model, key=api_key)
+    thinking_body = body_variants[0]
+    if not _THINKING_SUPPORT.get(model, True):
+        body_variants = body_variants[1:]
+    for body in body_variants:
+        payload = _post_once(model, url, body, timeout_seconds, thinking=body is thinking_body)
+        if payload is not None:
+            break
+
+    if not payload:
+        return None
+    return extract(payload)
+
+
+def _race_models(
+    models_to_try: List[str],
+    api_key: str,
+    body_variants: List[bytes],
+    timeout_seconds: int,
+    extract: Callable[[Dict[str, Any]], Any],
+    hedge: bool = True,
+    cache: bool = True,
+) -> Any:
+    """
+    Try model candidates in preference order with hedging and return the first
+    usable result, so a failing or stalled model does not cost its full timeout
+    while the configured model still answers whenever it is reasonably fast.
+    """
+    # Identical requests (duplicate submissions, client retries) reuse the last
+    # answer. The key covers the full body, including any inline media, plus the
+    # models and parser; failures are not cached. Conversational calls pass
+    # cache=False so a repeated question gets a fresh reply.
+    if not cache:
+        return _race_models_uncached(models_to_try, api_key, body_variants, timeout_seconds, extract, hedge)
+    digest = hashlib.blake2b(body_variants[-1], digest_size=16)
+    digest.update(f"{extract.__name__}|{'|'.join(models_to_try)}".encode("utf-8"))
+    cache_key = digest.hexdigest()
+    now = time.monotonic()
+    with _RESULT_CACHE_LOCK:
+        cached = _RESULT_CACHE.get(cache_key)
+        if cached and cached[0] > now:
+            _RESULT_CACHE.move_to_end(cache_key)
+            return _copy_result(cached[1])
+
+    result = _race_models_uncached(models_to_try, api_key, body_variants, timeout_seconds, extract, hedge)
+    if result is not None:
+        with _RESULT_CACHE_LOCK:
+            _RESULT_CACHE[cache_key] = (now + GEMINI_RESULT_CACHE_TTL_SECONDS, result)
+            _RESULT_CACHE.move_to_end(cache_key)
+            while len(_RESULT_CACHE) > GEMINI_RESULT_CACHE_MAX_ENTRIES:
+                _RESULT_CACHE.popitem(last=False)
+    return _copy_result(result)
+
+
+def _copy_result(result: Any) -> Any:
+    # Callers get their own top-level dict so they cannot alter the cached one.
+    return dict(result) if isinstance(result, dict) else result
+
+
+def _race_models_uncached(
+    models_to_try: List[str],
+    api_key: str,
+    body_variants: List[bytes],
+    timeout_seconds: int,
+    extract: Callable[[Dict[str, Any]], Any],
+    hedge: bool = True,
+) -> Any:
+    candidates = iter(enumerate(models_to_try))
+    hedge_delay = timeout_seconds * GEMINI_HEDGE_DELAY_FRACTION
+    pending: Dict[Any, int] = {}
+
+    def start_next() -> bool:
+        for rank, model in candidates:
+            pending[_RACE_POOL.submit(_try_model, model, api_key, body_variants, timeout_seconds, extract)] = rank
+            return True
+        return False
+
+    exhausted = not start_next()
+    while pending:
+        can_hedge = hedge and not exhausted and len(pending) < GEMINI_RACE_WIDTH
+        done, _ = wait(pending, timeout=hedge_delay if can_hedge else None, return_when=FIRST_COMPLETED)
+        if not done:
+            # The running attempts are slow: add the next candidate alongside.
+            exhausted = not start_next()
+            continue
+        # Prefer the higher-ranked model when several finish together.
+        for future in sorted(done, key=pending.get):
+            del pending[future]
+            result = future.result()
+            if result is not None:
+                for other in pending:
+                    other.cancel()
+                return result
+            # A failed attempt is replaced straight away rather than after the delay.
+            if not exhausted:
+                exhausted = not start_next()
+    return None
+
+
 def gemini_triage(
     text: str,
     people: int,
@@ -134,96 +413,53 @@ def gemini_triage(
         models_to_try = [_normalize_model_name(model_from_env or DEFAULT_MODEL)]
 
     prompt = (
-        "You are an emergency triage AI for Telangana disaster response.\n"
-        "Classify incident and return STRICT JSON only with keys:\n"
-        "category (string), priority (1-5 int), division_type (one of Rescue, Medical, Logistics, Communication),\n"
-        "required_skills (array of short strings), urgency_level (Critical|High|Medium|Low), confidence (0-1 number).\n"
-        "No markdown, no prose.\n\n"
+        f"{_TRIAGE_PROMPT_PREFIX}"
         f"place={place or ''}\n"
         f"people={people}\n"
         f"category_hint={category_hint or ''}\n"
         f"text={text or ''}\n"
     )
+    body_variants = _body_variants([{"text": prompt}], temperature=0.1, max_output_tokens=512)
 
-    contents = [{"parts": [{"text": prompt}]}]
-    generation_base = {
-        "temperature": 0.1,
-        "maxOutputTokens": 512,
-    }
-    body_variants = [
-        {
-            "contents": contents,
-            "generationConfig": {
-                **generation_base,
-                "thinkingConfig": {"thinkingBudget": 0},
-            },
-        },
-        {
-            "contents": contents,
-            "generationConfig": generation_base,
-        },
-    ]
+    return _race_models(models_to_try, api_key, body_variants, timeout_seconds, _parse_triage_payload)
 
-    for model in models_to_try:
-        payload = None
-        url = GEMINI_API_URL.format(model=model, key=api_key)
-        for body in body_variants:
-            req = urllib.request.Request(
-                url=url,
-                data=json.dumps(body).encode("utf-8"),
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-            try:
-                with urllib.request.urlopen(req, timeout=timeout_seconds) as response:
-                    payload = json.loads(response.read().decode("utf-8"))
-                break
-            except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, json.JSONDecodeError):
-                payload = None
-                continue
-
-        if not payload:
-            continue
 
-        candidates = payload.get("candidates") or []
-        if not candidates:
-            continue
+def _parse_triage_payload(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    candidates = payload.get("candidates") or []
+    if not candidates:
+        return None
 
-        parts = ((candidates[0].get("content") or {}).get("parts") or [])
-        if not parts:
-            continue
+    parts = ((candidates[0].get("content") or {}).get("parts") or [])
+    if not parts:
+        return None
 
-        raw_text = parts[0].get("text", "")
-        parsed = _extract_json(raw_text)
-        if not parsed:
-            continue
+    raw_text = parts[0].get("text", "")
+    parsed = _extract_json(raw_text)
+    if not parsed:
+        return None
 
-        category = str(parsed.get("category") or "").strip() or "General Emergency"
-        priority = _clamp_priority(parsed.get("priority"), fallback=3)
-        division_type = _sanitize_division(parsed.get("division_type"), fallback="Rescue")
-        required_skills = parsed.get("required_skills")
-        if not isinstance(required_skills, list):
-            required_skills = []
-        required_skills = [str(s).strip().lower() for s in required_skills if str(s).strip()]
-        urgency = str(parsed.get("urgency_level") or "").strip().title()
-        if urgency not in {"Critical", "High", "Medium", "Low"}:
-            urgency = "Medium"
-        try:
-            confidence = float(parsed.get("confidence", 0.7))
-            confidence = max(0.0, min(1.0, confidence))
-        except Exception:
-            confidence = 0.7
-
-        return {
-            "category": category,
-            "priority": priority,
-            "division_type": division_type,
-            "required_skills": required_skills,
-            "urgency_level": urgency,
-            "confidence": round(confidence, 2),
-        }
+    category = str(parsed.get("category") or "").strip() or "General Emergency"
+    priority = _clamp_priority(parsed.get("priority"), fallback=3)
+    division_type = _sanitize_division(parsed.get("division_type"), fallback="Rescue")
+    required_skills = parsed.get("required_skills")
+    if not isinstance(required_skills, list):
+        required_skills = []
+    required_skills = [skill for s in required_skills if (skill := str(s).strip().lower())]
+    urgency = _URGENCY_MAP.get(str(parsed.get("urgency_level") or "").strip().lower(), _URGENCY_DEFAULT)
+    try:
+        confidence = float(parsed.get("confidence", 0.7))
+        confidence = max(0.0, min(1.0, confidence))
+    except Exception:
+        confidence = 0.7
 
-    return None
+    return {
+        "category": category,
+        "priority": priority,
+        "division_type": division_type,
+        "required_skills": required_skills,
+        "urgency_level": urgency,
+        "confidence": round(confidence, 2),
+    }
 
 
 def _first_candidate_text(payload: Dict[str, Any]) -> Optional[str]:
@@ -241,6 +477,7 @@ def _gemini_generate_text_from_parts(
     timeout_seconds: int = 10,
     max_output_tokens: int = 1024,
     temperature: float = 0.2,
+    cache: bool = True,
 ) -> Optional[str]:
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
@@ -251,50 +488,13 @@ def _gemini_generate_text_from_parts(
     if not models_to_try:
         models_to_try = [_normalize_model_name(model_from_env or DEFAULT_MODEL)]
 
-    contents = [{"parts": parts}]
-    generation_base = {
-        "temperature": temperature,
-        "maxOutputTokens": max_output_tokens,
-    }
-    body_variants = [
-        {
-            "contents": contents,
-            "generationConfig": {
-                **generation_base,
-                "thinkingConfig": {"thinkingBudget": 0},
-            },
-        },
-        {
-            "contents": contents,
-            "generationConfig": generation_base,
-        },
-    ]
-
-    for model in models_to_try:
-        payload = None
-        url = GEMINI_API_URL.format(model=model, key=api_key)
-        for body in body_variants:
-            req = urllib.request.Request(
-                url=url,
-                data=json.dumps(body).encode("utf-8"),
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-            try:
-                with urllib.request.urlopen(req, timeout=timeout_seconds) as response:
-                    payload = json.loads(response.read().decode("utf-8"))
-                break
-            except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, json.JSONDecodeError):
-                payload = None
-                continue
-
-        if not payload:
-            continue
-        text = _first_candidate_text(payload)
-        if text:
-            return text
+    body_variants = _body_variants(parts, temperature=temperature, max_output_tokens=max_output_tokens)
+    # Re-uploading inline media to a second model costs more than waiting.
+    hedge = not any("inlineData" in part for part in parts)
 
-    return None
+    return _race_models(
+        models_to_try, api_key, body_variants, timeout_seconds, _first_candidate_text, hedge=hedge, cache=cache
+    )
 
 
 def gemini_structured_incident_analysis(
@@ -381,6 +581,25 @@ def gemini_summarize_incident(context_text: str, timeout_seconds: int = 8) -> Op
     return line
 
 
+def _read_inline_base64(path: str, max_inline_bytes: int) -> Optional[str]:
+    """
+    Base64 of a media file for inlineData, or None if unreadable or over the
+    inline limit. The file is memory-mapped and encoded straight from the page
+    cache, so no intermediate copy of the raw bytes is made.
+    """
+    try:
+        with open(path, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size > max_inline_bytes:
+                return None
+            if size == 0:
+                return ""
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return base64.b64encode(mapped).decode("ascii")
+    except Exception:
+        return None
+
+
 def gemini_multimodal_media_insight(
     media_paths: List[str],
     context_hint: str = "",
@@ -402,25 +621,27 @@ def gemini_multimodal_media_insight(
         }
     ]
 
+    paths = media_paths[:max_files]
+    if len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            encoded = list(pool.map(lambda path: _read_inline_base64(path, max_inline_bytes), paths))
+    else:
+        encoded = [_read_inline_base64(path, max_inline_bytes) for path in paths]
+
     attached = 0
-    for path in media_paths[:max_files]:
-        try:
-            with open(path, "rb") as handle:
-                blob = handle.read(max_inline_bytes + 1)
-            if len(blob) > max_inline_bytes:
-                continue
-            mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
-            parts.append(
-                {
-                    "inlineData": {
-                        "mimeType": mime,
-                        "data": base64.b64encode(blob).decode("utf-8"),
-                    }
-                }
-            )
-            attached += 1
-        except Exception:
+    for path, data in zip(paths, encoded):
+        if data is None:
             continue
+        mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        parts.append(
+            {
+                "inlineData": {
+                    "mimeType": mime,
+                    "data": data,
+                }
+            }
+        )
+        attached += 1
 
     if attached == 0:
         return None
@@ -438,13 +659,8 @@ def gemini_multimodal_media_insight(
 
 def gemini_transcribe_audio(audio_path: str, language_hint: str = "en", timeout_seconds: int = 12) -> Optional[str]:
     max_inline_bytes = max(100000, int(os.getenv("GEMINI_AUDIO_MAX_INLINE_BYTES", "5000000")))
-    try:
-        with open(audio_path, "rb") as handle:
-            blob = handle.read(max_inline_bytes + 1)
-    except Exception:
-        return None
-
-    if len(blob) > max_inline_bytes:
+    data = _read_inline_base64(audio_path, max_inline_bytes)
+    if data is None:
         return None
 
     mime = mimetypes.guess_type(audio_path)[0] or "audio/m4a"
@@ -459,7 +675,7 @@ def gemini_transcribe_audio(audio_path: str, language_hint: str = "en", timeout_
         {
             "inlineData": {
                 "mimeType": mime,
-                "data": base64.b64encode(blob).decode("utf-8"),
+                "data": data,
             }
         },
     ]
@@ -497,6 +713,7 @@ def gemini_chat_followup_response(
         timeout_seconds=timeout_seconds,
         max_output_tokens=220,
         temperature=0.3,
+        cache=False,
     )
     if not raw:
         return None
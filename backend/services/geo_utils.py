@@ -1,5 +1,8 @@
 import math
-from typing import Dict, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
 
 
 TELANGANA_CITY_COORDS: Dict[str, Tuple[float, float]] = {
@@ -34,7 +37,68 @@ def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return earth_radius_km * c
 
 
+def haversine_km_many(
+    lat: float,
+    lon: float,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Return distances in km from one coordinate to arrays of coordinates.
+
+    Writes the result into `out` (allocated when omitted), so callers scoring
+    large fleets can reuse that buffer between calls. Each call also allocates
+    two temporaries of the same length: cos(lat) and the longitude term.
+    """
+    earth_radius_km = 6371.0
+    lat1 = math.radians(lat)
+    lon1 = math.radians(lon)
+
+    out = np.radians(lats, out=out)
+    cos_lats = np.cos(out)
+    cos_lats *= math.cos(lat1)
+    out -= lat1
+    out *= 0.5
+    np.sin(out, out=out)
+    np.square(out, out=out)
+
+    scratch = np.radians(lons)
+    scratch -= lon1
+    scratch *= 0.5
+    np.sin(scratch, out=scratch)
+    np.square(scratch, out=scratch)
+    scratch *= cos_lats
+    out += scratch
+
+    np.sqrt(out, out=out)
+    np.arcsin(out, out=out)
+    out *= 2 * earth_radius_km
+    return out
+
+
+def rank_key(lat0: float, lon0: float) -> Callable[[float, float], float]:
+    """
+    Return a cheap squared-distance key for ordering points around (lat0, lon0).
+
+    Uses the equirectangular approximation without the square root, which keeps
+    the ordering of nearby (state-scale) candidates. Use haversine_km for any
+    distance shown to users.
+    """
+    cos_lat0 = math.cos(math.radians(lat0))
+
+    def key(lat: float, lon: float) -> float:
+        dx = (lon - lon0) * cos_lat0
+        dy = lat - lat0
+        return dx * dx + dy * dy
+
+    return key
+
+
+@lru_cache(maxsize=4096)
 def infer_tel_city_from_text(text: str) -> str:
+    # Inputs are organization/staff names and addresses that recur on every
+    # assignment and nearest-facility lookup, so the city scan runs once each.
     text_l = (text or "").lower()
     for city in TELANGANA_CITY_COORDS:
         if city in text_l:
@@ -1,9 +1,13 @@
-import json
+import asyncio
+import hashlib
 import math
-import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+import orjson
+from sqlalchemy import func, select, union_all
 from sqlalchemy.orm import Session
 
 from database import MobileIncident, SOSRequest
@@ -13,11 +17,19 @@ from services.gemini_service import (
     gemini_summarize_incident,
     gemini_transcribe_audio,
 )
+from services.geo_utils import haversine_km_many
 from services.triage_service import triage_sos
 from services.weather_verification_service import verify_weather
 
 
 REQUIRED_CATEGORIES_ORDER = ["Voice", "Image", "Video", "Text", "Emergency SOS"]
+# Runs the blocking Gemini calls of build_ai_incident_bundle off the event loop,
+# concurrently where they are independent. Each of these threads waits on one
+# gemini_service pool thread (more only while a slow model is hedged), so this
+# stays well under that pool's size.
+_BUNDLE_POOL = ThreadPoolExecutor(max_workers=12, thread_name_prefix="incident-ai")
+# Length of one degree of arc on the 6371 km sphere used by haversine_km.
+KM_PER_DEGREE = 6371.0 * math.pi / 180.0
 
 
 def _to_float(value: Any, default: float = 0.0) -> float:
@@ -62,19 +74,15 @@ def _detect_categories(
     videos = media_manifest.get("videos") or []
     audio = media_manifest.get("audio") or []
 
-    detected = set()
-    if voice_text or audio:
-        detected.add("Voice")
-    if images:
-        detected.add("Image")
-    if videos:
-        detected.add("Video")
-    if text:
-        detected.add("Text")
-    if ticket_type.upper() == "SOS":
-        detected.add("Emergency SOS")
-
-    return [category for category in REQUIRED_CATEGORIES_ORDER if category in detected]
+    # One flag per entry of REQUIRED_CATEGORIES_ORDER, in the same order.
+    detected = (
+        bool(voice_text or audio),
+        bool(images),
+        bool(videos),
+        bool(text),
+        ticket_type.upper() == "SOS",
+    )
+    return [category for category, hit in zip(REQUIRED_CATEGORIES_ORDER, detected) if hit]
 
 
 def _primary_category(detected_categories: List[str]) -> str:
@@ -89,16 +97,6 @@ def _primary_category(detected_categories: List[str]) -> str:
     return "Text"
 
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    radius_km = 6371.0
-    lat1_r, lon1_r = math.radians(lat1), math.radians(lon1)
-    lat2_r, lon2_r = math.radians(lat2), math.radians(lon2)
-    dlat = lat2_r - lat1_r
-    dlon = lon2_r - lon1_r
-    a = math.sin(dlat / 2) ** 2 + math.cos(lat1_r) * math.cos(lat2_r) * math.sin(dlon / 2) ** 2
-    return radius_km * 2 * math.asin(math.sqrt(a))
-
-
 def _similar_incident(incident_type: str, candidate_type: str) -> bool:
     lhs = incident_type.lower().strip()
     rhs = (candidate_type or "").lower().strip()
@@ -117,22 +115,44 @@ def _nearby_ticket_metrics(
     time_window_start = now_utc - timedelta(minutes=60)
     radius_km = 3.0
 
+    # The database narrows the window to a bounding box around the radius (a
+    # degree of latitude is never shorter than 110 km, so the box is a superset);
+    # the exact haversine check then runs vectorized over the few rows left.
+    lat_margin = radius_km / 110.0
+    lon_margin = radius_km / (110.0 * max(math.cos(math.radians(latitude)), 0.01))
+    # Core selects return plain Row tuples: no ORM entities, identity map or
+    # attribute instrumentation for rows that are only read once. Both tables
+    # come back in one UNION ALL round trip, each branch on its own index.
+    rows = db.execute(
+        union_all(
+            select(SOSRequest.latitude, SOSRequest.longitude, SOSRequest.category).where(
+                SOSRequest.created_at >= time_window_start,
+                SOSRequest.latitude.between(latitude - lat_margin, latitude + lat_margin),
+                SOSRequest.longitude.between(longitude - lon_margin, longitude + lon_margin),
+            ),
+            select(MobileIncident.latitude, MobileIncident.longitude, MobileIncident.incident_type).where(
+                MobileIncident.created_at >= time_window_start,
+                MobileIncident.latitude.between(latitude - lat_margin, latitude + lat_margin),
+                MobileIncident.longitude.between(longitude - lon_margin, longitude + lon_margin),
+            ),
+        )
+    ).all()
+
     nearby_total = 0
     nearby_similar = 0
-
-    recent_sos = db.query(SOSRequest).filter(SOSRequest.created_at >= time_window_start).all()
-    for row in recent_sos:
-        if _haversine_km(latitude, longitude, row.latitude, row.longitude) <= radius_km:
-            nearby_total += 1
-            if _similar_incident(incident_type, row.category or ""):
-                nearby_similar += 1
-
-    recent_mobile = db.query(MobileIncident).filter(MobileIncident.created_at >= time_window_start).all()
-    for row in recent_mobile:
-        if _haversine_km(latitude, longitude, row.latitude, row.longitude) <= radius_km:
-            nearby_total += 1
-            if _similar_incident(incident_type, row.incident_type):
-                nearby_similar += 1
+    if rows:
+        lats = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+        lons = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        # Flat-earth distance is within a fraction of a percent of haversine at
+        # this scale, so it discards far rows with no trig per row; only rows
+        # inside a 2% margin get the exact check.
+        dx = (lons - longitude) * (math.cos(math.radians(latitude)) * KM_PER_DEGREE)
+        dy = (lats - latitude) * KM_PER_DEGREE
+        candidates = np.flatnonzero(dx * dx + dy * dy <= (radius_km * 1.02) ** 2)
+        exact_km = haversine_km_many(latitude, longitude, lats[candidates], lons[candidates])
+        nearby = candidates[exact_km <= radius_km]
+        nearby_total = int(nearby.size)
+        nearby_similar = sum(1 for i in nearby if _similar_incident(incident_type, rows[i][2] or ""))
 
     return {
         "nearby_total_count": nearby_total,
@@ -140,33 +160,59 @@ def _nearby_ticket_metrics(
     }
 
 
+def _normalized_text(text: Optional[str], voice_text: Optional[str]) -> str:
+    return " ".join(f"{text or ''} {voice_text or ''}".lower().split())
+
+
+def _text_digest(normalized: str) -> Optional[str]:
+    if not normalized:
+        return None
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def normalized_text_hash(text: Optional[str], voice_text: Optional[str]) -> Optional[str]:
+    """Digest of the whitespace/case-normalized report text, or None when there is none."""
+    return _text_digest(_normalized_text(text, voice_text))
+
+
 def _compute_fraud_risk(
     db: Session,
     device_id_hash: str,
     client_ip: str,
-    text: str,
-    voice_text: str,
+    normalized_text: str,
+    text_hash: Optional[str],
     media_manifest: Dict[str, Any],
     now_utc: datetime,
     ai_credibility_risk: float,
 ) -> Dict[str, Any]:
     burst_window = now_utc - timedelta(minutes=10)
     long_window = now_utc - timedelta(hours=24)
-    normalized_text = " ".join(f"{text} {voice_text}".lower().split())
-
-    same_device_recent = 0
-    same_ip_recent = 0
-    exact_text_matches = 0
-
-    recent = db.query(MobileIncident).filter(MobileIncident.created_at >= long_window).all()
-    for row in recent:
-        if row.created_at >= burst_window and device_id_hash and row.device_id_hash == device_id_hash:
-            same_device_recent += 1
-        if row.created_at >= burst_window and client_ip and row.client_ip == client_ip:
-            same_ip_recent += 1
-        previous_text = " ".join(f"{row.text or ''} {row.voice_transcript or ''}".lower().split())
-        if normalized_text and previous_text == normalized_text:
-            exact_text_matches += 1
+
+    # Each signal is an indexed COUNT(*) subquery; all of them come back in one
+    # round trip. Text repeats are compared by the hash stored at insert time.
+    signals = {}
+    if device_id_hash:
+        signals["same_device"] = (
+            select(func.count())
+            .where(MobileIncident.device_id_hash == device_id_hash, MobileIncident.created_at >= burst_window)
+            .scalar_subquery()
+        )
+    if client_ip:
+        signals["same_ip"] = (
+            select(func.count())
+            .where(MobileIncident.client_ip == client_ip, MobileIncident.created_at >= burst_window)
+            .scalar_subquery()
+        )
+    if text_hash:
+        signals["exact_text"] = (
+            select(func.count())
+            .where(MobileIncident.normalized_text_hash == text_hash, MobileIncident.created_at >= long_window)
+            .scalar_subquery()
+        )
+    counts = dict(zip(signals, db.execute(select(*signals.values())).one())) if signals else {}
+    same_device_recent = counts.get("same_device", 0)
+    same_ip_recent = counts.get("same_ip", 0)
+    exact_text_matches = counts.get("exact_text", 0)
 
     low_information = int((not normalized_text or len(normalized_text) < 12) and not any(media_manifest.values()))
 
@@ -232,7 +278,17 @@ def _media_paths(manifest: Dict[str, Any], bucket: str) -> List[str]:
     return results
 
 
-def build_ai_incident_bundle(
+def _run_in_pool(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> "asyncio.Future[Any]":
+    """Run a blocking call on the bundle pool and await it without holding the event loop."""
+    return asyncio.wrap_future(_BUNDLE_POOL.submit(fn, *args, **kwargs))
+
+
+async def _none() -> None:
+    """Placeholder awaitable for a bundle call that is skipped."""
+    return None
+
+
+async def build_ai_incident_bundle(
     db: Session,
     metadata: Dict[str, Any],
     media_manifest: Dict[str, Any],
@@ -259,11 +315,27 @@ def build_ai_incident_bundle(
     video_paths = _media_paths(media_manifest, "videos")
     audio_paths = _media_paths(media_manifest, "audio")
 
-    # AI STT fallback when raw transcript is not available from client.
-    if not voice_text and audio_paths:
-        transcribed = gemini_transcribe_audio(audio_paths[0], language_hint="en")
-        if transcribed:
-            voice_text = transcribed
+    # Transcription and media insights are independent network calls, so they
+    # run concurrently and the bundle waits for the slowest rather than the sum.
+    # All three are awaited even when one raises, so none is left unretrieved.
+    transcribed, image_insight, video_insight = await asyncio.gather(
+        # AI STT fallback when raw transcript is not available from client.
+        _run_in_pool(gemini_transcribe_audio, audio_paths[0], language_hint="en")
+        if not voice_text and audio_paths
+        else _none(),
+        _run_in_pool(gemini_multimodal_media_insight, image_paths, context_hint="image evidence")
+        if image_paths
+        else _none(),
+        _run_in_pool(gemini_multimodal_media_insight, video_paths, context_hint="video evidence")
+        if video_paths
+        else _none(),
+        return_exceptions=True,
+    )
+    for outcome in (transcribed, image_insight, video_insight):
+        if isinstance(outcome, BaseException):
+            raise outcome
+    if transcribed:
+        voice_text = transcribed
 
     detected_categories = _detect_categories(
         ticket_type=ticket_type,
@@ -273,16 +345,14 @@ def build_ai_incident_bundle(
     )
     primary_category = _primary_category(detected_categories)
 
-    image_insight = gemini_multimodal_media_insight(image_paths, context_hint="image evidence") if image_paths else None
-    video_insight = gemini_multimodal_media_insight(video_paths, context_hint="video evidence") if video_paths else None
-
     combined_context = " ".join(
         item
         for item in [text, voice_text, image_insight or "", video_insight or ""]
         if str(item).strip()
     ).strip()
 
-    ai_structured = gemini_structured_incident_analysis(
+    ai_structured = await _run_in_pool(
+        gemini_structured_incident_analysis,
         context_text=combined_context or "No context provided",
         detected_categories=detected_categories,
     ) or {}
@@ -291,7 +361,8 @@ def build_ai_incident_bundle(
     if ai_structured.get("people_estimate"):
         people_hint = max(people_hint, _to_int(ai_structured.get("people_estimate"), people_hint))
 
-    triage = triage_sos(
+    triage = await _run_in_pool(
+        triage_sos,
         text=text or combined_context,
         voice_transcript=voice_text,
         people=people_hint,
@@ -310,43 +381,70 @@ def build_ai_incident_bundle(
 
     summary = str(ai_structured.get("concise_summary") or "").strip()
     if not summary:
-        summary = gemini_summarize_incident(combined_context or text or voice_text or incident_type) or ""
+        summary = await _run_in_pool(
+            gemini_summarize_incident, combined_context or text or voice_text or incident_type
+        ) or ""
     if not summary:
         summary = (combined_context or text or voice_text or "Emergency incident reported")[:180]
     if len(summary) > 180:
         summary = summary[:177] + "..."
 
-    nearby_metrics = _nearby_ticket_metrics(
-        db=db,
-        latitude=latitude,
-        longitude=longitude,
-        incident_type=incident_type,
-        now_utc=datetime.utcnow(),
+    # One clock reading for every window below, taken after the AI calls so the
+    # windows end when the local checks actually run.
+    now_utc = datetime.utcnow()
+
+    # Normalized once: the fraud check and the stored row share the same hash.
+    normalized_text = _normalized_text(text, voice_text)
+    text_hash = _text_digest(normalized_text)
+
+    def _local_checks() -> Tuple[Dict[str, int], Dict[str, Any]]:
+        nearby = _nearby_ticket_metrics(
+            db=db,
+            latitude=latitude,
+            longitude=longitude,
+            incident_type=incident_type,
+            now_utc=now_utc,
+        )
+        fraud = _compute_fraud_risk(
+            db=db,
+            device_id_hash=device_id_hash,
+            client_ip=client_ip,
+            normalized_text=normalized_text,
+            text_hash=text_hash,
+            media_manifest=media_manifest,
+            now_utc=now_utc,
+            ai_credibility_risk=float(ai_structured.get("credibility_risk", 0.3) or 0.3),
+        )
+        return nearby, fraud
+
+    # The weather lookup overlaps the database checks, which run one after the
+    # other on a worker thread so the Session is never used concurrently and the
+    # event loop stays free.
+    weather_task = asyncio.create_task(
+        verify_weather(
+            latitude=latitude,
+            longitude=longitude,
+            incident_type=incident_type,
+            text=combined_context or summary,
+        )
     )
+    local_task = asyncio.ensure_future(asyncio.to_thread(_local_checks))
+    try:
+        (nearby_metrics, fraud), weather = await asyncio.gather(local_task, weather_task)
+    except BaseException:
+        weather_task.cancel()
+        # The worker thread may still hold the Session; let it finish before the
+        # caller uses the Session again.
+        await asyncio.wait({local_task, weather_task})
+        raise
+
     nearby_ticket_count = nearby_metrics["nearby_total_count"]
     nearby_similar_count = nearby_metrics["nearby_similar_count"]
     location_density_score = max(0.0, min(1.0, nearby_similar_count / 12.0))
+    fraud_risk_score = float(fraud.get("fraud_risk_score", 0.0))
 
-    weather = verify_weather(
-        latitude=latitude,
-        longitude=longitude,
-        incident_type=incident_type,
-        text=combined_context or summary,
-    )
     weather_confirmation_score = float(weather.get("confirmation_score", 0.5))
 
-    fraud = _compute_fraud_risk(
-        db=db,
-        device_id_hash=device_id_hash,
-        client_ip=client_ip,
-        text=text,
-        voice_text=voice_text,
-        media_manifest=media_manifest,
-        now_utc=datetime.utcnow(),
-        ai_credibility_risk=float(ai_structured.get("credibility_risk", 0.3) or 0.3),
-    )
-    fraud_risk_score = float(fraud.get("fraud_risk_score", 0.0))
-
     is_sos = ticket_type.upper() == "SOS" or primary_category == "Emergency SOS"
     priority_score = _priority_score(
         severity_score=severity_score,
@@ -360,9 +458,9 @@ def build_ai_incident_bundle(
     external_id = str(metadata.get("external_id") or metadata.get("ticket_id_client") or "").strip()
     idempotency_key = (
         str(nested_metadata.get("idempotency_key") or metadata.get("idempotency_key") or external_id).strip()
-        or f"idem-{datetime.utcnow().timestamp()}"
+        or f"idem-{now_utc.timestamp()}"
     )
-    chat_session_id = f"CHAT-{uuid.uuid5(uuid.NAMESPACE_DNS, idempotency_key).hex[:12]}"
+    chat_session_id = f"CHAT-{hashlib.blake2b(idempotency_key.encode(), digest_size=6).hexdigest()}"
 
     normalized_payload = {
         "idempotency_key": idempotency_key,
@@ -451,9 +549,10 @@ def build_ai_incident_bundle(
         "latitude": latitude,
         "longitude": longitude,
         "device_id_hash": device_id_hash,
+        "normalized_text_hash": text_hash,
         "normalized_payload": normalized_payload,
         "verification_payload": verification_payload,
         "dispatch_payload": dispatch_payload,
-        "media_manifest_json": json.dumps(media_manifest),
+        "media_manifest_json": orjson.dumps(media_manifest).decode(),
         "is_sos": is_sos,
     }
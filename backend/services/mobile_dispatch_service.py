@@ -1,14 +1,23 @@
-import json
+import asyncio
 import os
 import random
 import time
-import urllib.error
-import urllib.request
 from typing import Any, Dict, Optional, Tuple
 
+import httpx
+import orjson
 from sqlalchemy.orm import Session
 
-from database import MobileDispatchAttempt, MobileIncident
+from database import MobileDispatchAttempt, MobileIncident, SessionLocal
+
+# Shared keep-alive pool: retries and consecutive dispatches to the same ticket
+# endpoint reuse the open connection instead of repeating the TCP/TLS handshake.
+_HTTP = httpx.Client(
+    timeout=None,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=8),
+)
+# Incidents with background retries pending, by incident id.
+_RETRYING: Dict[str, asyncio.Task] = {}
 
 
 def _http_post_json(
@@ -17,7 +26,7 @@ def _http_post_json(
     idempotency_key: str,
     timeout_seconds: int = 12,
 ) -> Tuple[int, str]:
-    body = json.dumps(payload).encode("utf-8")
+    body = orjson.dumps(payload)
     headers = {
         "Content-Type": "application/json",
         "Idempotency-Key": idempotency_key,
@@ -27,114 +36,178 @@ def _http_post_json(
     if auth_token:
         headers["Authorization"] = f"Bearer {auth_token}"
 
-    req = urllib.request.Request(
-        url=url,
-        data=body,
+    # Error statuses come back as a normal response; transport failures raise
+    # and are recorded by the retry loop.
+    response = _HTTP.post(
+        url,
+        content=body,
         headers=headers,
-        method="POST",
+        timeout=httpx.Timeout(timeout_seconds, connect=min(3.0, timeout_seconds)),
     )
+    return response.status_code, response.text
 
-    try:
-        with urllib.request.urlopen(req, timeout=timeout_seconds) as response:
-            status = int(response.status)
-            text = response.read().decode("utf-8")
-            return status, text
-    except urllib.error.HTTPError as exc:
-        status = int(exc.code or 500)
-        text = exc.read().decode("utf-8", errors="ignore")
-        return status, text
 
+def _backoff_seconds(base_backoff_seconds: float, attempt_no: int) -> float:
+    sleep_seconds = base_backoff_seconds * (2 ** (attempt_no - 1))
+    sleep_seconds += random.uniform(0, sleep_seconds * 0.2)
+    return min(sleep_seconds, 30)
 
-def dispatch_ticket_with_retry(
+
+def _dispatch_attempt(
     db: Session,
     incident: MobileIncident,
     payload: Dict[str, Any],
     endpoint: str,
+    attempt_no: int,
 ) -> Dict[str, Any]:
-    max_attempts = max(1, int(os.getenv("MOBILE_DISPATCH_MAX_ATTEMPTS", "6")))
-    base_backoff_seconds = max(0.2, float(os.getenv("MOBILE_DISPATCH_INITIAL_BACKOFF_SECONDS", "1.0")))
-
+    started = time.time()
+    success = False
+    response_body = ""
     response_payload: Dict[str, Any] = {}
-    last_error = ""
-    last_status: Optional[int] = None
-
-    for attempt_no in range(1, max_attempts + 1):
-        started = time.time()
-        success = False
-        response_body = ""
-        error_message = None
-        status_code = None
-
-        try:
-            status_code, response_body = _http_post_json(
-                url=endpoint,
-                payload=payload,
-                idempotency_key=incident.idempotency_key,
-                timeout_seconds=12,
-            )
-            success = (200 <= status_code < 300) or status_code == 409
-            if response_body:
-                try:
-                    response_payload = json.loads(response_body)
-                except Exception:
-                    response_payload = {"raw": response_body}
-        except Exception as exc:
-            error_message = str(exc)
-            last_error = error_message
-
-        latency_ms = int((time.time() - started) * 1000)
-        attempt_row = MobileDispatchAttempt(
-            incident_id=incident.id,
-            attempt_no=attempt_no,
-            success=success,
-            http_status=status_code,
-            latency_ms=latency_ms,
-            response_body=response_body[:4000] if response_body else None,
-            error_message=error_message,
-        )
-        db.add(attempt_row)
-        db.commit()
+    error_message = None
+    status_code = None
 
-        last_status = status_code
-        if success:
-            ticket_id = (
-                str(response_payload.get("ticket_id") or response_payload.get("sos_id") or "").strip()
-                or incident.external_id
-            )
-            incident.dispatch_status = "Dispatched"
-            incident.dispatched_ticket_id = ticket_id
-            incident.dispatch_error = None
-            db.commit()
-            return {
-                "success": True,
-                "status_code": status_code,
-                "ticket_id": ticket_id,
-                "attempts": attempt_no,
-                "response": response_payload,
-            }
-
-        # Non-retryable range: client-side validation/auth errors except 429.
-        if status_code is not None and status_code < 500 and status_code not in (408, 409, 429):
-            last_error = response_body[:500] if response_body else "non_retryable_client_error"
-            break
-
-        if attempt_no < max_attempts:
-            sleep_seconds = base_backoff_seconds * (2 ** (attempt_no - 1))
-            sleep_seconds += random.uniform(0, sleep_seconds * 0.2)
-            time.sleep(min(sleep_seconds, 30))
+    try:
+        status_code, response_body = _http_post_json(
+            url=endpoint,
+            payload=payload,
+            idempotency_key=incident.idempotency_key,
+            timeout_seconds=12,
+        )
+        success = (200 <= status_code < 300) or status_code == 409
+        if response_body:
+            try:
+                response_payload = orjson.loads(response_body)
+            except Exception:
+                response_payload = {"raw": response_body}
+    except Exception as exc:
+        error_message = str(exc)
+
+    latency_ms = int((time.time() - started) * 1000)
+    attempt_row = MobileDispatchAttempt(
+        incident_id=incident.id,
+        attempt_no=attempt_no,
+        success=success,
+        http_status=status_code,
+        latency_ms=latency_ms,
+        response_body=response_body[:4000] if response_body else None,
+        error_message=error_message,
+    )
+    db.add(attempt_row)
+    db.commit()
 
+    if success:
+        ticket_id = (
+            str(response_payload.get("ticket_id") or response_payload.get("sos_id") or "").strip()
+            or incident.external_id
+        )
+        incident.dispatch_status = "Dispatched"
+        incident.dispatched_ticket_id = ticket_id
+        incident.dispatch_error = None
+        db.commit()
+        return {
+            "success": True,
+            "status_code": status_code,
+            "ticket_id": ticket_id,
+            "attempts": attempt_no,
+            "response": response_payload,
+        }
+
+    # Non-retryable range: client-side validation/auth errors except 429.
+    retryable = not (status_code is not None and status_code < 500 and status_code not in (408, 409, 429))
+    if not retryable:
+        last_error = response_body[:500] if response_body else "non_retryable_client_error"
+    else:
+        last_error = error_message or (
+            f"dispatch_failed_status_{status_code}" if status_code is not None else "dispatch_failed_unknown"
+        )
     incident.dispatch_status = "Queued"
-    incident.dispatch_error = (
-        last_error
-        or (f"dispatch_failed_status_{last_status}" if last_status is not None else "dispatch_failed_unknown")
-    )[:2000]
+    incident.dispatch_error = last_error[:2000]
     db.commit()
 
     return {
         "success": False,
-        "status_code": last_status,
+        "status_code": status_code,
         "ticket_id": None,
-        "attempts": max_attempts,
+        "attempts": attempt_no,
         "response": response_payload,
         "error": incident.dispatch_error,
+        "retryable": retryable,
     }
+
+
+def _dispatch_attempt_in_new_session(
+    incident_id: str,
+    payload: Dict[str, Any],
+    endpoint: str,
+    attempt_no: int,
+) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        incident = db.query(MobileIncident).filter(MobileIncident.id == incident_id).first()
+        if not incident or incident.dispatch_status == "Dispatched":
+            return None
+        return _dispatch_attempt(db, incident, payload, endpoint, attempt_no)
+    finally:
+        db.close()
+
+
+async def _retry_dispatch_in_background(
+    incident_id: str,
+    payload: Dict[str, Any],
+    endpoint: str,
+    max_attempts: int,
+    base_backoff_seconds: float,
+) -> None:
+    """Remaining attempts after the inline one; the request has already returned."""
+    try:
+        for attempt_no in range(2, max_attempts + 1):
+            await asyncio.sleep(_backoff_seconds(base_backoff_seconds, attempt_no - 1))
+            # The POST and the session both block, so each attempt runs on a
+            # worker thread with its own session.
+            result = await asyncio.to_thread(
+                _dispatch_attempt_in_new_session, incident_id, payload, endpoint, attempt_no
+            )
+            if result is None or result["success"] or not result["retryable"]:
+                break
+    finally:
+        _RETRYING.pop(incident_id, None)
+
+
+def dispatch_retry_in_flight(incident_id: str) -> bool:
+    return incident_id in _RETRYING
+
+
+def dispatch_ticket_with_retry(
+    db: Session,
+    incident: MobileIncident,
+    payload: Dict[str, Any],
+    endpoint: str,
+) -> Dict[str, Any]:
+    """
+    Make the first dispatch attempt inline and hand any retries to the event loop.
+    A failed first attempt leaves the incident Queued; the backoff sleeps happen
+    in a background task so the request is not held for up to a minute.
+    """
+    max_attempts = max(1, int(os.getenv("MOBILE_DISPATCH_MAX_ATTEMPTS", "6")))
+    base_backoff_seconds = max(0.2, float(os.getenv("MOBILE_DISPATCH_INITIAL_BACKOFF_SECONDS", "1.0")))
+
+    result = _dispatch_attempt(db, incident, payload, endpoint, attempt_no=1)
+    result["retry_scheduled"] = False
+    if result["success"] or not result.pop("retryable") or max_attempts == 1:
+        return result
+    if dispatch_retry_in_flight(incident.id):
+        return result
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # No event loop (sync caller): the incident stays Queued for
+        # /dispatch/retry-pending to pick up.
+        return result
+    # Keep a reference so the task is not garbage-collected mid-backoff.
+    _RETRYING[incident.id] = loop.create_task(
+        _retry_dispatch_in_background(incident.id, payload, endpoint, max_attempts, base_backoff_seconds)
+    )
+    result["retry_scheduled"] = True
+    return result
@@ -128,9 +128,9 @@ def triage_sos(
     elif extracted_people >= 15:
         priority += 1
 
-    # Add text-based urgency terms.
-    urgency_boost = sum(weight for term, weight in HIGH_RISK_TERMS.items() if term in merged)
-    priority += urgency_boost
+    # Add text-based urgency terms. The hits also become the result tags.
+    risk_terms = [term for term in HIGH_RISK_TERMS if term in merged]
+    priority += sum(HIGH_RISK_TERMS[term] for term in risk_terms)
 
     # External risk from geospatial analysis.
     priority += environmental_risk
@@ -157,7 +157,7 @@ def triage_sos(
         "required_skills": best_rule["required_skills"],
         "division_type": _infer_division_type(best_category, best_rule["required_skills"], merged),
         "confidence": confidence,
-        "tags": [k for k in HIGH_RISK_TERMS if k in merged][:8],
+        "tags": risk_terms[:8],
         "source": "rules",
     }
 
@@ -1,87 +1,204 @@
-import json
+import asyncio
+import math
+import os
 import time
-import urllib.parse
-import urllib.request
-from typing import Any, Dict, Tuple
+from collections import OrderedDict
+from functools import lru_cache, partial
+from typing import Any, Dict, NamedTuple, Optional, Tuple
 
+import httpx
+import orjson
 
-_WEATHER_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+# Parsed once at import; httpx reuses a URL instance as-is instead of parsing
+# the string again on every request.
+OPEN_METEO_FORECAST_URL = httpx.URL("https://api.open-meteo.com/v1/forecast")
+OPEN_METEO_CURRENT_FIELDS = "rain,precipitation,weather_code,temperature_2m,wind_speed_10m"
+WEATHER_KEYWORDS = (
+    "flood",
+    "rain",
+    "storm",
+    "cyclone",
+    "weather",
+    "landslide",
+    "water logging",
+    "cloudburst",
+)
+
+# WMO codes for moderate/heavy rain, violent showers and thunderstorms.
+SEVERE_WEATHER_CODES = frozenset({61, 63, 65, 80, 81, 82, 95, 96, 99})
+
+
+class Weather(NamedTuple):
+    """Current conditions for a cell, typed once when the response is parsed."""
+
+    rain: float
+    precipitation: float
+    weather_code: int
+    temperature_c: float
+    wind_speed_kmh: float
+
+    def as_payload(self) -> Dict[str, Any]:
+        return {"provider": "open-meteo", **self._asdict()}
+
+
+WEATHER_FETCH_TIMEOUT_SECONDS = float(os.getenv("WEATHER_FETCH_TIMEOUT_SECONDS", "4"))
+# A reading is served as-is while fresh. For the same span again it is still
+# served, marked stale, while a background fetch refreshes it; after that the
+# caller waits for a live fetch.
+WEATHER_CACHE_TTL_SECONDS = 600
+# Last good reading per cell, least recently used first:
+# {key: (fresh_until, stale_until, weather)}. Times are on the monotonic clock
+# so wall-clock adjustments cannot extend or cut short an entry.
+WEATHER_CACHE_MAX_ENTRIES = 4096
+_WEATHER_CACHE: "OrderedDict[int, Tuple[float, float, Weather]]" = OrderedDict()
+# Live fetches in progress by cache key; concurrent lookups for the same cell
+# await the one request instead of issuing their own.
+_INFLIGHT: Dict[int, "asyncio.Task[Weather]"] = {}
+# Every lookup goes to the same host, so one keep-alive HTTP/2 pool serves all
+# concurrent verifications over a few connections. The transport's retries=1
+# re-attempts a failed connect only, never a request that reached the server.
+# Built on first use inside the running loop; closed by close_weather_client().
+_HTTP: Optional[httpx.AsyncClient] = None
+
+
+def _http() -> httpx.AsyncClient:
+    global _HTTP
+    if _HTTP is None:
+        _HTTP = httpx.AsyncClient(
+            timeout=WEATHER_FETCH_TIMEOUT_SECONDS,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=1,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            ),
+        )
+    return _HTTP
+
+
+async def close_weather_client() -> None:
+    global _HTTP
+    if _HTTP is not None:
+        client, _HTTP = _HTTP, None
+        await client.aclose()
+
+
+def _mentions_weather(lowered: str) -> bool:
+    for keyword in WEATHER_KEYWORDS:
+        if keyword in lowered:
+            return True
+    return False
+
+
+@lru_cache(maxsize=1024)
+def _is_weather_incident_type(incident_type: str) -> bool:
+    return _mentions_weather(incident_type.lower())
 
 
 def _is_weather_related(incident_type: str, text: str) -> bool:
-    merged = f"{incident_type} {text}".lower()
-    keywords = [
-        "flood",
-        "rain",
-        "storm",
-        "cyclone",
-        "weather",
-        "landslide",
-        "water logging",
-        "cloudburst",
-    ]
-    return any(keyword in merged for keyword in keywords)
+    # Incident types come from a small vocabulary, so their verdict is cached and
+    # a weather type answers without lowercasing the free text at all.
+    return _is_weather_incident_type(incident_type) or _mentions_weather(text.lower())
 
 
-def _cache_key(latitude: float, longitude: float) -> str:
-    return f"{round(latitude, 2)}:{round(longitude, 2)}"
+def _cache_key(latitude: float, longitude: float) -> int:
+    # 0.01-degree cell packed into one int: shifted latitude and longitude in
+    # hundredths each fit in 16 bits.
+    return (round((latitude + 90.0) * 100.0) << 16) | round((longitude + 180.0) * 100.0)
 
 
-def _read_cache(latitude: float, longitude: float) -> Dict[str, Any]:
+def _read_cache(latitude: float, longitude: float) -> Tuple[Optional[Weather], bool]:
+    """Cached reading and whether it is still fresh; None once past the stale window."""
     key = _cache_key(latitude, longitude)
     entry = _WEATHER_CACHE.get(key)
     if not entry:
-        return {}
-    expires_at, payload = entry
-    if expires_at <= time.time():
+        return None, False
+    fresh_until, stale_until, payload = entry
+    now = time.monotonic()
+    if stale_until <= now:
         _WEATHER_CACHE.pop(key, None)
-        return {}
-    return payload
+        return None, False
+    _WEATHER_CACHE.move_to_end(key)
+    return payload, fresh_until > now
 
 
-def _write_cache(latitude: float, longitude: float, payload: Dict[str, Any], ttl_seconds: int = 600) -> None:
+def _write_cache(
+    latitude: float,
+    longitude: float,
+    payload: Weather,
+    ttl_seconds: int = WEATHER_CACHE_TTL_SECONDS,
+) -> None:
     key = _cache_key(latitude, longitude)
-    _WEATHER_CACHE[key] = (time.time() + ttl_seconds, payload)
+    now = time.monotonic()
+    _WEATHER_CACHE[key] = (now + ttl_seconds, now + 2 * ttl_seconds, payload)
+    _WEATHER_CACHE.move_to_end(key)
+    if len(_WEATHER_CACHE) > WEATHER_CACHE_MAX_ENTRIES:
+        _WEATHER_CACHE.popitem(last=False)
 
 
-def _fetch_open_meteo(latitude: float, longitude: float, timeout_seconds: int = 4) -> Dict[str, Any]:
-    query = urllib.parse.urlencode(
-        {
+async def _fetch_open_meteo(
+    latitude: float,
+    longitude: float,
+    timeout_seconds: float = WEATHER_FETCH_TIMEOUT_SECONDS,
+) -> Weather:
+    response = await _http().get(
+        OPEN_METEO_FORECAST_URL,
+        params={
             "latitude": latitude,
             "longitude": longitude,
-            "current": "rain,precipitation,weather_code,temperature_2m,wind_speed_10m",
+            "current": OPEN_METEO_CURRENT_FIELDS,
             "timezone": "auto",
-        }
+        },
+        timeout=timeout_seconds,
     )
-    url = f"https://api.open-meteo.com/v1/forecast?{query}"
-    req = urllib.request.Request(url=url, method="GET")
-    with urllib.request.urlopen(req, timeout=timeout_seconds) as response:
-        payload = json.loads(response.read().decode("utf-8"))
+    response.raise_for_status()
+    payload = orjson.loads(response.content)
     current = payload.get("current") or {}
-    return {
-        "provider": "open-meteo",
-        "rain": float(current.get("rain", 0) or 0),
-        "precipitation": float(current.get("precipitation", 0) or 0),
-        "weather_code": int(current.get("weather_code", 0) or 0),
-        "temperature_c": float(current.get("temperature_2m", 0) or 0),
-        "wind_speed_kmh": float(current.get("wind_speed_10m", 0) or 0),
-    }
-
-
-def _confirmation_score(weather: Dict[str, Any]) -> float:
-    rain = float(weather.get("rain", 0) or 0)
-    precipitation = float(weather.get("precipitation", 0) or 0)
-    code = int(weather.get("weather_code", 0) or 0)
-
-    severe_codes = {61, 63, 65, 80, 81, 82, 95, 96, 99}
-    if rain >= 2.0 or precipitation >= 3.0 or code in severe_codes:
+    return Weather(
+        rain=float(current.get("rain", 0) or 0),
+        precipitation=float(current.get("precipitation", 0) or 0),
+        weather_code=int(current.get("weather_code", 0) or 0),
+        temperature_c=float(current.get("temperature_2m", 0) or 0),
+        wind_speed_kmh=float(current.get("wind_speed_10m", 0) or 0),
+    )
+
+
+async def _fetch_and_cache(latitude: float, longitude: float) -> Weather:
+    weather = await _fetch_open_meteo(latitude, longitude)
+    _write_cache(latitude, longitude, weather)
+    return weather
+
+
+def _fetch_done(key: int, task: "asyncio.Task[Weather]") -> None:
+    _INFLIGHT.pop(key, None)
+    # Mark the outcome retrieved so a failed background refresh nobody awaited
+    # is not reported as an unhandled task exception.
+    if not task.cancelled():
+        task.exception()
+
+
+def _start_fetch(latitude: float, longitude: float) -> "asyncio.Task[Weather]":
+    key = _cache_key(latitude, longitude)
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_and_cache(latitude, longitude))
+        _INFLIGHT[key] = task
+        task.add_done_callback(partial(_fetch_done, key))
+    return task
+
+
+def _confirmation_score(weather: Weather) -> float:
+    rain = weather.rain
+    precipitation = weather.precipitation
+
+    if rain >= 2.0 or precipitation >= 3.0 or weather.weather_code in SEVERE_WEATHER_CODES:
         return 1.0
     if rain > 0 or precipitation > 0:
         return 0.6
     return 0.0
 
 
-def verify_weather(
+async def verify_weather(
     latitude: float,
     longitude: float,
     incident_type: str,
@@ -96,29 +213,52 @@ def verify_weather(
             "weather": {},
         }
 
+    # Open-Meteo rejects these only after a full round trip; they also fall
+    # outside the packed cache key's range. Answered like any other failed
+    # lookup, so callers see the same payload and keep scoring.
+    if not (
+        math.isfinite(latitude)
+        and math.isfinite(longitude)
+        and -90.0 <= latitude <= 90.0
+        and -180.0 <= longitude <= 180.0
+    ):
+        return {
+            "weather_relevant": True,
+            "confirmation_score": 0.5,
+            "status": "unavailable_fallback",
+            "source": "fallback",
+            "weather": {},
+            "used_cache": False,
+            "error": "invalid coordinates",
+        }
+
+    cached, fresh = _read_cache(latitude, longitude)
+    if cached:
+        if not fresh:
+            # Stale-while-revalidate: answer now, refresh for the next caller.
+            _start_fetch(latitude, longitude)
+        return {
+            "weather_relevant": True,
+            "confirmation_score": _confirmation_score(cached),
+            "status": "cached" if fresh else "stale",
+            "source": "cache",
+            "weather": cached.as_payload(),
+            "used_cache": True,
+        }
+
     try:
-        weather = _fetch_open_meteo(latitude, longitude)
-        _write_cache(latitude, longitude, weather)
+        # Shielded so one caller being cancelled does not cancel the fetch the
+        # others are waiting on.
+        weather = await asyncio.shield(_start_fetch(latitude, longitude))
         return {
             "weather_relevant": True,
             "confirmation_score": _confirmation_score(weather),
             "status": "live",
             "source": "open-meteo",
-            "weather": weather,
+            "weather": weather.as_payload(),
             "used_cache": False,
         }
     except Exception as exc:
-        cached = _read_cache(latitude, longitude)
-        if cached:
-            return {
-                "weather_relevant": True,
-                "confirmation_score": _confirmation_score(cached),
-                "status": "cached",
-                "source": "cache",
-                "weather": cached,
-                "used_cache": True,
-                "error": str(exc),
-            }
         return {
             "weather_relevant": True,
             "confirmation_score": 0.5,
@@ -1,46 +1,74 @@
-from typing import Optional
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import case, func, update
 
 from database import Division, Organization, Staff
 
 
-def _normalize_org_status(org: Organization) -> None:
-    load = max(0, int(org.current_load or 0))
-    capacity = max(0, int(org.capacity or 0))
-    org.current_load = load
-    if capacity == 0:
-        org.status = "Active"
-        return
-    if load >= capacity:
-        org.status = "Overloaded"
-    elif load > 0:
-        org.status = "Active"
+def apply_load_status(entity) -> None:
+    """
+    Derive status from current_load and capacity for an Organization or Division
+    edited through its update route. Unlike _load_status_values, zero capacity
+    counts as Overloaded and the load is stored as sent.
+    """
+    if entity.current_load >= entity.capacity:
+        entity.status = "Overloaded"
+    elif entity.current_load > 0:
+        entity.status = "Active"
     else:
-        org.status = "Available"
+        entity.status = "Available"
 
 
-def _normalize_division_status(division: Division) -> None:
-    load = max(0, int(division.current_load or 0))
-    capacity = max(0, int(division.capacity or 0))
-    division.current_load = load
-    if capacity == 0:
-        division.status = "Active"
-        return
-    if load >= capacity:
-        division.status = "Overloaded"
-    elif load > 0:
-        division.status = "Active"
-    else:
-        division.status = "Available"
+def _load_status_values(model, delta: Any) -> Tuple[Tuple[Any, Any], ...]:
+    """
+    SET clauses that move current_load by delta (floored at 0) and derive status
+    from the new load, evaluated by the database against the row's current values.
+    Status comes first so dialects that apply SET left to right still read the
+    old load.
+    """
+    moved = func.coalesce(model.current_load, 0) + delta
+    load = case((moved < 0, 0), else_=moved)
+    capacity = func.coalesce(model.capacity, 0)
+    status = case(
+        (capacity <= 0, "Active"),
+        (load >= capacity, "Overloaded"),
+        (load > 0, "Active"),
+        else_="Available",
+    )
+    return (model.status, status), (model.current_load, load)
 
 
-def _set_staff_assigned(staff: Staff, sos_id: Optional[str]) -> None:
-    staff.availability = "Busy"
-    if sos_id:
-        staff.current_location = f"Assigned to SOS {sos_id}"
+def _move_load(db, model, old_id: Optional[str], new_id: Optional[str]) -> None:
+    """Decrement old_id and increment new_id (either may be None) in one UPDATE."""
+    deltas = {row_id: delta for row_id, delta in ((old_id, -1), (new_id, 1)) if row_id}
+    if not deltas:
+        return
+    delta = next(iter(deltas.values())) if len(deltas) == 1 else case(deltas, value=model.id)
+    db.execute(
+        update(model)
+        .where(model.id.in_(deltas))
+        .ordered_values(*_load_status_values(model, delta))
+        .execution_options(synchronize_session="fetch")
+    )
 
 
-def _set_staff_released(staff: Staff) -> None:
-    staff.availability = "Available"
+def _move_staff(db, old_id: Optional[str], new_id: Optional[str], sos_id: Optional[str]) -> None:
+    """Release old_id and mark new_id busy (either may be None) in one UPDATE."""
+    availability = {row_id: value for row_id, value in ((old_id, "Available"), (new_id, "Busy")) if row_id}
+    if not availability:
+        return
+    values = {"availability": case(availability, value=Staff.id)}
+    if new_id and sos_id:
+        values["current_location"] = case(
+            (Staff.id == new_id, f"Assigned to SOS {sos_id}"),
+            else_=Staff.current_location,
+        )
+    db.execute(
+        update(Staff)
+        .where(Staff.id.in_(availability))
+        .values(values)
+        .execution_options(synchronize_session="fetch")
+    )
 
 
 def transfer_assignment_workload(
@@ -56,40 +84,19 @@ def transfer_assignment_workload(
     """
     Move active workload counters/resources from old assignment to new assignment.
     Safe for partial changes and no-op when IDs are unchanged.
+    Each table gets at most one UPDATE covering both sides of the move, computed
+    in the database, so concurrent transfers cannot lose a counter increment and
+    no row is read first. The UPDATEs run in the caller's transaction and are
+    committed or rolled back with it.
     """
-    if old_org_id and old_org_id != new_org_id:
-        old_org = db.query(Organization).filter(Organization.id == old_org_id).first()
-        if old_org:
-            old_org.current_load = max(0, int(old_org.current_load or 0) - 1)
-            _normalize_org_status(old_org)
-
-    if old_division_id and old_division_id != new_division_id:
-        old_div = db.query(Division).filter(Division.id == old_division_id).first()
-        if old_div:
-            old_div.current_load = max(0, int(old_div.current_load or 0) - 1)
-            _normalize_division_status(old_div)
-
-    if old_staff_id and old_staff_id != new_staff_id:
-        old_staff = db.query(Staff).filter(Staff.id == old_staff_id).first()
-        if old_staff:
-            _set_staff_released(old_staff)
-
-    if new_org_id and new_org_id != old_org_id:
-        new_org = db.query(Organization).filter(Organization.id == new_org_id).first()
-        if new_org:
-            new_org.current_load = int(new_org.current_load or 0) + 1
-            _normalize_org_status(new_org)
-
-    if new_division_id and new_division_id != old_division_id:
-        new_div = db.query(Division).filter(Division.id == new_division_id).first()
-        if new_div:
-            new_div.current_load = int(new_div.current_load or 0) + 1
-            _normalize_division_status(new_div)
-
-    if new_staff_id and new_staff_id != old_staff_id:
-        new_staff = db.query(Staff).filter(Staff.id == new_staff_id).first()
-        if new_staff:
-            _set_staff_assigned(new_staff, sos_id=sos_id)
+    if old_org_id != new_org_id:
+        _move_load(db, Organization, old_org_id, new_org_id)
+
+    if old_division_id != new_division_id:
+        _move_load(db, Division, old_division_id, new_division_id)
+
+    if old_staff_id != new_staff_id:
+        _move_staff(db, old_staff_id, new_staff_id, sos_id=sos_id)
 
 
 def release_assignment_workload(
@@ -0,0 +1,62 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import mobile_dispatch_service as dispatch_service
+from services.mobile_dispatch_service import dispatch_retry_in_flight, dispatch_ticket_with_retry
+
+INCIDENT = SimpleNamespace(id="incident-1")
+FAILED = {"success": False, "retryable": True}
+
+
+class BackgroundRetryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        dispatch_service._RETRYING.clear()
+        patches = [
+            mock.patch.dict("os.environ", {"MOBILE_DISPATCH_MAX_ATTEMPTS": "3"}),
+            mock.patch.object(dispatch_service, "_backoff_seconds", return_value=0.0),
+            mock.patch.object(dispatch_service, "_dispatch_attempt", side_effect=lambda *args, **kwargs: dict(FAILED)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        dispatch_service._RETRYING.clear()
+
+    async def _run_retries(self, background_attempt):
+        with mock.patch.object(
+            dispatch_service, "_dispatch_attempt_in_new_session", side_effect=background_attempt
+        ) as attempt:
+            result = dispatch_ticket_with_retry(None, INCIDENT, {}, "http://dispatch.invalid/tickets")
+            self.assertTrue(result["retry_scheduled"])
+            self.assertTrue(dispatch_retry_in_flight(INCIDENT.id))
+            task = dispatch_service._RETRYING[INCIDENT.id]
+            try:
+                await task
+            finally:
+                self.assertFalse(dispatch_retry_in_flight(INCIDENT.id))
+        return attempt
+
+    async def test_in_flight_cleared_after_success(self):
+        attempt = await self._run_retries(lambda *args: {"success": True, "retryable": False})
+        self.assertEqual(attempt.call_count, 1)
+
+    async def test_in_flight_cleared_after_attempts_run_out(self):
+        attempt = await self._run_retries(lambda *args: dict(FAILED))
+        self.assertEqual(attempt.call_count, 2)
+
+    async def test_in_flight_cleared_when_attempt_raises(self):
+        def broken(*args):
+            raise RuntimeError("database unavailable")
+
+        with self.assertRaises(RuntimeError):
+            await self._run_retries(broken)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import weather_verification_service as weather_service
+from services.weather_verification_service import Weather, verify_weather
+
+LATITUDE = 17.385
+LONGITUDE = 78.4867
+OLD_READING = Weather(rain=0.0, precipitation=0.0, weather_code=0, temperature_c=30.0, wind_speed_kmh=5.0)
+NEW_READING = Weather(rain=3.0, precipitation=4.0, weather_code=65, temperature_c=24.0, wind_speed_kmh=20.0)
+
+
+class VerifyWeatherTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        weather_service._WEATHER_CACHE.clear()
+        weather_service._INFLIGHT.clear()
+        self.fetches = 0
+
+    def tearDown(self):
+        weather_service._WEATHER_CACHE.clear()
+        weather_service._INFLIGHT.clear()
+
+    async def _fake_fetch(self, latitude, longitude, timeout_seconds=None):
+        self.fetches += 1
+        await asyncio.sleep(0.05)
+        return NEW_READING
+
+    def _verify(self):
+        return verify_weather(LATITUDE, LONGITUDE, incident_type="Flood", text="water rising")
+
+    async def test_concurrent_callers_share_one_fetch(self):
+        with mock.patch.object(weather_service, "_fetch_open_meteo", self._fake_fetch):
+            first, second = await asyncio.gather(self._verify(), self._verify())
+
+        self.assertEqual(self.fetches, 1)
+        self.assertEqual(first["status"], "live")
+        self.assertEqual(second["status"], "live")
+        self.assertEqual(first["weather"], second["weather"])
+        self.assertEqual(weather_service._INFLIGHT, {})
+
+    async def test_stale_entry_is_served_while_it_refreshes(self):
+        key = weather_service._cache_key(LATITUDE, LONGITUDE)
+        now = time.monotonic()
+        weather_service._WEATHER_CACHE[key] = (now - 1.0, now + 600.0, OLD_READING)
+
+        with mock.patch.object(weather_service, "_fetch_open_meteo", self._fake_fetch):
+            stale = await self._verify()
+            self.assertEqual(stale["status"], "stale")
+            self.assertEqual(stale["weather"], OLD_READING.as_payload())
+            refresh = weather_service._INFLIGHT.get(key)
+            self.assertIsNotNone(refresh)
+
+            await refresh
+            fresh = await self._verify()
+
+        self.assertEqual(self.fetches, 1)
+        self.assertEqual(fresh["status"], "cached")
+        self.assertEqual(fresh["weather"], NEW_READING.as_payload())
+        self.assertEqual(weather_service._INFLIGHT, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, Organization
+from services.workload_service import transfer_assignment_workload
+
+
+class TransferAssignmentWorkloadTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.engine = create_engine(f"sqlite:///{self.db_path}")
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        with self.Session() as db:
+            db.add_all([
+                Organization(id="o1", name="Org 1", type="NGO", category="Relief", capacity=5, current_load=1),
+                Organization(id="o2", name="Org 2", type="NGO", category="Relief", capacity=5, current_load=0),
+            ])
+            db.commit()
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.db_path)
+
+    def _loads(self):
+        with self.Session() as db:
+            return {org.id: org.current_load for org in db.query(Organization)}
+
+    def test_rollback_in_fresh_session_undoes_transfer(self):
+        db = self.Session()
+        try:
+            transfer_assignment_workload(db, "o1", None, None, "o2", None, None)
+            db.rollback()
+        finally:
+            db.close()
+        self.assertEqual(self._loads(), {"o1": 1, "o2": 0})
+
+    def test_commit_applies_transfer(self):
+        with self.Session() as db:
+            transfer_assignment_workload(db, "o1", None, None, "o2", None, None)
+            db.commit()
+        self.assertEqual(self._loads(), {"o1": 0, "o2": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()